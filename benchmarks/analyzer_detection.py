@@ -0,0 +1,91 @@
+"""Measures the per-face cost of re-detecting faces inside the DeepFace analyzer.
+
+Times three ways of analyzing the same detected crops: DeepFace.analyze with
+its default detector (a second detection on every crop), DeepFace.analyze
+with detection skipped, and DeepFaceAnalyzer, which also preprocesses each
+crop once and calls the models directly. Run from the repository root:
+
+    python -m benchmarks.analyzer_detection --faces-dir faces/
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from deepface import DeepFace
+
+from src.emotion_analyzer.deepface_analyzer import DeepFaceAnalyzer
+
+ACTIONS = ["emotion", "age", "gender"]
+
+
+def load_crops(faces_dir, face_size):
+    """Fixture faces if a directory is given, otherwise noise crops."""
+    if faces_dir is None:
+        rng = np.random.default_rng(0)
+        return [
+            rng.integers(0, 255, (face_size, face_size, 3), dtype=np.uint8)
+            for _ in range(4)
+        ]
+    paths = sorted(
+        p
+        for p in Path(faces_dir).iterdir()
+        if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".bmp"}
+    )
+    if not paths:
+        raise ValueError(f"No face images found in {faces_dir}")
+    return [cv2.resize(cv2.imread(str(p)), (face_size, face_size)) for p in paths]
+
+
+def per_face_ms(analyze, crops, iterations):
+    for crop in crops:
+        analyze(crop)
+    times = []
+    for _ in range(iterations):
+        for crop in crops:
+            start = time.perf_counter()
+            analyze(crop)
+            times.append(time.perf_counter() - start)
+    return np.asarray(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--faces-dir", help="directory of face crops (default: noise)")
+    parser.add_argument("--face-size", type=int, default=160)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    crops = load_crops(args.faces_dir, args.face_size)
+    analyzer = DeepFaceAnalyzer()
+    configurations = {
+        "analyze, default detector": lambda crop: DeepFace.analyze(
+            crop, actions=ACTIONS, enforce_detection=False, silent=True
+        ),
+        "analyze, detection skipped": lambda crop: DeepFace.analyze(
+            crop,
+            actions=ACTIONS,
+            detector_backend="skip",
+            enforce_detection=False,
+            silent=True,
+        ),
+        "DeepFaceAnalyzer": analyzer.analyze_emotions,
+    }
+    results = {
+        name: per_face_ms(analyze, crops, args.iterations)
+        for name, analyze in configurations.items()
+    }
+
+    baseline = np.median(results["analyze, default detector"])
+    print(f"{len(crops)} crops of {args.face_size}x{args.face_size}, per face:")
+    for name, ms in results.items():
+        print(
+            f"  {name:<28} p50 {np.median(ms):7.1f} ms  p95 {np.percentile(ms, 95):7.1f} ms  "
+            f"saves {baseline - np.median(ms):7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
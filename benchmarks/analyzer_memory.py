@@ -0,0 +1,94 @@
+"""Compares peak RSS and startup time of the two analyzer runtimes.
+
+Each configuration runs in a fresh interpreter so their memory does not
+overlap. Run from the repository root:
+
+    python -m benchmarks.analyzer_memory
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+CONFIGURATIONS = {
+    "mtcnn+deepface": "deepface",
+    "mtcnn+torch": "torch",
+}
+
+
+def measure(analyzer_name):
+    """Loads the detector and analyzer and runs one inference on a noise frame."""
+    start = time.perf_counter()
+    from src.emotion_analyzer import EmotionAnalyzer
+    from src.face_detection import FaceDetector
+
+    face_detector = FaceDetector(model_name="mtcnn")
+    emotion_analyzer = EmotionAnalyzer(analyzer_name=analyzer_name)
+    loaded = time.perf_counter()
+
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    face_detector.detect_faces(frame)
+    emotion_analyzer.analyze_emotions(frame[120:360, 220:420])
+    finished = time.perf_counter()
+
+    return {
+        "startup_s": loaded - start,
+        "first_inference_s": finished - loaded,
+        # ru_maxrss is reported in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "tensorflow_loaded": "tensorflow" in sys.modules,
+        "torch_loaded": "torch" in sys.modules,
+    }
+
+
+def run_configuration(name):
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.analyzer_memory", "--child", name],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def print_report(report):
+    print(
+        f"{'configuration':<16} {'startup s':>10} {'first inf s':>12} "
+        f"{'peak RSS MB':>12} {'tensorflow':>11} {'torch':>6}"
+    )
+    for name, row in report.items():
+        if "error" in row:
+            print(f"{name:<16} failed: {row['error']}")
+            continue
+        print(
+            f"{name:<16} {row['startup_s']:>10.2f} {row['first_inference_s']:>12.2f} "
+            f"{row['peak_rss_mb']:>12.0f} {str(row['tensorflow_loaded']):>11} "
+            f"{str(row['torch_loaded']):>6}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--child", choices=CONFIGURATIONS, help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help="print raw JSON")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(CONFIGURATIONS[args.child])))
+        return
+
+    report = {name: run_configuration(name) for name in CONFIGURATIONS}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
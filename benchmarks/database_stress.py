@@ -0,0 +1,127 @@
+"""Stress-tests DatabaseManager with concurrent readers and writers.
+
+Writer threads insert rows while reader threads and asyncio tasks run the
+trend queries against the same manager. The run fails if any call raises or
+if rows are lost. Run from the repository root:
+
+    python -m benchmarks.database_stress --writers 4 --readers 8 --seconds 10
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from src.database_manager import DatabaseManager
+
+EMOTIONS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+
+def write_rows(db_manager, deadline, counts, errors, batch_size):
+    inserted = 0
+    try:
+        while time.perf_counter() < deadline:
+            if batch_size > 1:
+                now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                db_manager.add_emotions(
+                    [
+                        (random.choice(EMOTIONS), 30, "Woman", now, "stress")
+                        for _ in range(batch_size)
+                    ]
+                )
+                inserted += batch_size
+            else:
+                db_manager.add_emotion(random.choice(EMOTIONS), 30, "Man", "stress")
+                inserted += 1
+    except Exception as e:
+        errors.append(e)
+    counts.append(inserted)
+
+
+def query_once(db_manager):
+    now = datetime.datetime.now()
+    start = now - datetime.timedelta(days=1)
+    db_manager.get_emotion_counts(start, now)
+    db_manager.get_happy_emotion_counts(start, now)
+    db_manager.get_most_common_emotion(start, now)
+    db_manager.get_happy_emotion_counts_for_week(start.date(), now.date())
+    db_manager.get_emotion_trends()
+
+
+def read_rows(db_manager, deadline, counts, errors):
+    queries = 0
+    try:
+        while time.perf_counter() < deadline:
+            query_once(db_manager)
+            queries += 1
+    except Exception as e:
+        errors.append(e)
+    counts.append(queries)
+
+
+async def read_rows_async(db_manager, deadline, tasks):
+    async def task():
+        queries = 0
+        while time.perf_counter() < deadline:
+            await asyncio.to_thread(query_once, db_manager)
+            queries += 1
+        return queries
+
+    return sum(await asyncio.gather(*(task() for _ in range(tasks))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--async-tasks", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_manager = DatabaseManager(str(Path(directory) / "stress.db"))
+        deadline = time.perf_counter() + args.seconds
+        written, read, errors = [], [], []
+        threads = [
+            threading.Thread(
+                target=write_rows,
+                args=(db_manager, deadline, written, errors, args.batch_size),
+            )
+            for _ in range(args.writers)
+        ] + [
+            threading.Thread(
+                target=read_rows, args=(db_manager, deadline, read, errors)
+            )
+            for _ in range(args.readers)
+        ]
+        for thread in threads:
+            thread.start()
+        async_queries = asyncio.run(
+            read_rows_async(db_manager, deadline, args.async_tasks)
+        )
+        for thread in threads:
+            thread.join()
+
+        with db_manager.reader() as cursor:
+            (stored,) = cursor.execute("SELECT COUNT(*) FROM emotions").fetchone()
+        db_manager.close()
+
+    print(
+        f"{sum(written)} rows written ({sum(written) / args.seconds:.0f}/s), "
+        f"{sum(read) + async_queries} query rounds "
+        f"({(sum(read) + async_queries) / args.seconds:.0f}/s)"
+    )
+    if errors:
+        raise SystemExit(f"FAILED: {len(errors)} errors, first: {errors[0]!r}")
+    if stored != sum(written):
+        raise SystemExit(f"FAILED: {sum(written)} rows written but {stored} stored")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measures MTCNN detection time per frame at several batch sizes.
+
+Every batch size runs on the same frames, and the boxes of each batched
+call are checked against single-frame detect_faces calls. Run from the
+repository root:
+
+    python -m benchmarks.detection_batch --frames-dir frames/
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.face_detection import FaceDetector
+
+
+def load_frames(frames_dir, width, height, count):
+    """Fixture frames if a directory is given, otherwise noise frames."""
+    if frames_dir is None:
+        rng = np.random.default_rng(0)
+        return [
+            rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+            for _ in range(count)
+        ]
+    paths = sorted(
+        p
+        for p in Path(frames_dir).iterdir()
+        if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".bmp"}
+    )
+    if not paths:
+        raise ValueError(f"No images found in {frames_dir}")
+    frames = [cv2.resize(cv2.imread(str(p)), (width, height)) for p in paths]
+    return [frames[i % len(frames)] for i in range(count)]
+
+
+def per_frame_ms(detector, frames, batch_size, iterations):
+    detector.detect_faces_batch(frames[:batch_size])
+    times = []
+    for _ in range(iterations):
+        for i in range(0, len(frames) - batch_size + 1, batch_size):
+            batch = frames[i : i + batch_size]
+            start = time.perf_counter()
+            detector.detect_faces_batch(batch)
+            times.append((time.perf_counter() - start) / len(batch))
+    return np.asarray(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames-dir", help="directory of frames (default: noise)")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--frames", type=int, default=16)
+    parser.add_argument("--batch-sizes", default="1,2,4,8")
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames_dir, args.width, args.height, args.frames)
+    detector = FaceDetector(model_name="mtcnn")
+
+    single = [detector.detect_faces(frame) for frame in frames]
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    for batch_size in batch_sizes:
+        batched = []
+        for i in range(0, len(frames), batch_size):
+            batched.extend(detector.detect_faces_batch(frames[i : i + batch_size]))
+        if batched != single:
+            raise SystemExit(f"Batch size {batch_size}: boxes differ from detect_faces")
+    faces = sum(len(boxes) for boxes in single)
+    print(f"{len(frames)} frames, {faces} faces, boxes identical at every batch size")
+
+    print(f"{'batch size':<12}{'p50 ms/frame':>14}{'p95 ms/frame':>14}{'frames/s':>10}")
+    for batch_size in batch_sizes:
+        times = per_frame_ms(detector, frames, batch_size, args.iterations)
+        print(
+            f"{batch_size:<12}{np.percentile(times, 50):>14.1f}"
+            f"{np.percentile(times, 95):>14.1f}{1000 / times.mean():>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
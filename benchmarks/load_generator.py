@@ -0,0 +1,278 @@
+"""Generates synthetic load to find the capacity of the whole stack.
+
+The pipeline mode composes frames with a given number of faces taken from
+local fixture images and pushes them through detection, analysis,
+annotation and DatabaseManager at fixed target rates. Frames are scheduled
+open-loop, so latency is measured from when a frame was due and includes
+any backlog. Each rate reports throughput, latency percentiles and per-stage
+utilization; the stage with the highest utilization is the one that
+saturates first.
+
+The populate mode fills a database with years of realistic rows: opening
+hours, quieter weekends, seasonal variation and a skewed emotion mix.
+Run from the repository root:
+
+    python -m benchmarks.load_generator pipeline --faces-dir faces/ --faces 4 --rates 1,2,5,10
+    python -m benchmarks.load_generator populate --database load.db --years 3
+"""
+
+import argparse
+import datetime
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src import FrameProcessor
+from src.database_manager import DatabaseManager
+from src.emotion_analyzer import EmotionAnalyzer
+from src.face_detection import FaceDetector
+from src.video_source import SyntheticSource
+
+STAGES = ["compose", "detection", "analysis", "annotate", "database"]
+EMOTIONS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+EMOTION_WEIGHTS = [0.05, 0.01, 0.03, 0.35, 0.08, 0.08, 0.40]
+CAMERAS = ["entrance", "lobby", "cafeteria"]
+
+
+class FaceMosaic:
+    """Composes frames with N fixture faces at random non-overlapping spots."""
+
+    def __init__(self, faces_dir, width=1280, height=720, face_size=160, seed=0):
+        paths = sorted(
+            p
+            for p in Path(faces_dir).iterdir()
+            if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".bmp"}
+        )
+        if not paths:
+            raise ValueError(f"No face images found in {faces_dir}")
+        self.faces = [
+            cv2.resize(cv2.imread(str(p)), (face_size, face_size)) for p in paths
+        ]
+        self.width = width
+        self.height = height
+        self.face_size = face_size
+        self.rng = np.random.default_rng(seed)
+        self.background = self.rng.integers(0, 96, (height, width, 3), dtype=np.uint8)
+        # Grid cells with a margin, so faces never overlap or touch the edge
+        cell = face_size + face_size // 4
+        self.cells = [
+            (x, y)
+            for y in range(face_size // 8, height - cell + 1, cell)
+            for x in range(face_size // 8, width - cell + 1, cell)
+        ]
+
+    def compose(self, count):
+        """Returns a frame and the boxes of the faces placed in it."""
+        frame = self.background.copy()
+        boxes = []
+        count = min(count, len(self.cells))
+        for i in self.rng.choice(len(self.cells), count, replace=False):
+            x, y = self.cells[i]
+            face = self.faces[self.rng.integers(len(self.faces))]
+            frame[y : y + self.face_size, x : x + self.face_size] = face
+            boxes.append({"x": x, "y": y, "w": self.face_size, "h": self.face_size})
+        return frame, boxes
+
+
+def run_rate(rate, seconds, mosaic, faces, detector, analyzer, annotator, db):
+    """Runs the pipeline at one target rate; returns the per-frame measurements."""
+    period = 1.0 / rate
+    frames = max(1, int(rate * seconds))
+    stage_s = {name: [] for name in STAGES}
+    latencies, detected, rows = [], 0, 0
+    start = time.perf_counter()
+    for i in range(frames):
+        due = start + i * period
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        t = time.perf_counter()
+        frame, placed = mosaic.compose(faces)
+        stage_s["compose"].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        # detector None analyzes the placed boxes, measuring the rest of the stack
+        boxes = detector.detect_faces(frame) if detector else placed
+        stage_s["detection"].append(time.perf_counter() - t)
+        detected += len(boxes)
+
+        t = time.perf_counter()
+        results = []
+        for box in boxes:
+            x, y, w, h = box["x"], box["y"], box["w"], box["h"]
+            result = analyzer.analyze_emotions(frame[y : y + h, x : x + w])
+            result.region = (x, y, w, h)
+            results.append(result)
+        stage_s["analysis"].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        annotator.annotate_frame(frame, results)
+        stage_s["annotate"].append(time.perf_counter() - t)
+
+        t = time.perf_counter()
+        db.add_results(results, camera_id="load")
+        stage_s["database"].append(time.perf_counter() - t)
+        rows += len(results)
+        latencies.append(time.perf_counter() - due)
+    elapsed = time.perf_counter() - start
+    return {
+        "rate": rate,
+        "frames": frames,
+        "elapsed": elapsed,
+        "placed": faces * frames,
+        "detected": detected,
+        "rows": rows,
+        "latencies": np.asarray(latencies),
+        "stage_s": {name: np.asarray(s) for name, s in stage_s.items()},
+    }
+
+
+def report(run):
+    elapsed = run["elapsed"]
+    achieved = run["frames"] / elapsed
+    ms = run["latencies"] * 1000
+    saturated = achieved < 0.95 * run["rate"]
+    print(
+        f"target {run['rate']:g} frames/s: achieved {achieved:.2f} frames/s, "
+        f"{run['detected'] / elapsed:.1f} faces/s, {run['rows'] / elapsed:.1f} rows/s, "
+        f"detected {run['detected']}/{run['placed']} placed faces"
+        + (" SATURATED" if saturated else "")
+    )
+    print(
+        f"  latency p50 {np.percentile(ms, 50):.1f} ms  p95 {np.percentile(ms, 95):.1f} ms  "
+        f"p99 {np.percentile(ms, 99):.1f} ms  max {ms.max():.1f} ms"
+    )
+    utilization = {
+        name: run["rate"] * samples.mean() for name, samples in run["stage_s"].items()
+    }
+    for name, samples in run["stage_s"].items():
+        mean = samples.mean()
+        print(
+            f"  {name:<10} mean {mean * 1000:8.2f} ms  "
+            f"p95 {np.percentile(samples, 95) * 1000:8.2f} ms  "
+            f"capacity {1 / max(mean, 1e-9):8.1f} frames/s  "
+            f"utilization {utilization[name]:6.0%}"
+        )
+    bottleneck = max(utilization, key=utilization.get)
+    print(f"  saturates first: {bottleneck}")
+    return saturated
+
+
+def pipeline(args):
+    mosaic = FaceMosaic(args.faces_dir, args.width, args.height, args.face_size)
+    detector = None if args.detector == "placed" else FaceDetector(args.detector)
+    analyzer = EmotionAnalyzer(analyzer_name=args.analyzer)
+    # The annotator never reads frames, a synthetic source keeps it off the camera
+    annotator = FrameProcessor(SyntheticSource())
+    with tempfile.TemporaryDirectory() as directory:
+        db = DatabaseManager(args.database or str(Path(directory) / "load.db"))
+        try:
+            for rate in [float(r) for r in args.rates.split(",")]:
+                run = run_rate(
+                    rate,
+                    args.seconds,
+                    mosaic,
+                    args.faces,
+                    detector,
+                    analyzer,
+                    annotator,
+                    db,
+                )
+                if report(run) and args.stop_when_saturated:
+                    break
+        finally:
+            db.close()
+
+
+def populate(args):
+    """Inserts args.years of rows ending today, one day per transaction."""
+    rng = np.random.default_rng(args.seed)
+    db = DatabaseManager(args.database)
+    end = datetime.date.today()
+    day = end - datetime.timedelta(days=int(365.25 * args.years))
+    # Visits per hour of the day: closed at night, peaks at lunch
+    hourly = np.array(
+        [0] * 7 + [0.3, 0.8, 1.0, 1.0, 1.2, 1.6, 1.3, 1.0, 0.9, 0.9, 0.7, 0.4] + [0] * 5
+    )
+    hourly /= hourly.sum()
+    start = time.perf_counter()
+    inserted = 0
+    while day <= end:
+        season = 1 + 0.2 * np.sin(2 * np.pi * day.timetuple().tm_yday / 365.25)
+        weekend = 0.25 if day.weekday() >= 5 else 1.0
+        count = rng.poisson(args.rows_per_day * season * weekend)
+        if count:
+            seconds = np.sort(
+                rng.choice(24, count, p=hourly) * 3600 + rng.integers(0, 3600, count)
+            )
+            midnight = datetime.datetime.combine(day, datetime.time.min)
+            rows = [
+                (
+                    emotion,
+                    int(age),
+                    gender,
+                    (midnight + datetime.timedelta(seconds=int(s))).strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    ),
+                    camera,
+                )
+                for emotion, age, gender, s, camera in zip(
+                    rng.choice(EMOTIONS, count, p=EMOTION_WEIGHTS),
+                    np.clip(rng.normal(36, 11, count), 16, 80),
+                    rng.choice(["Man", "Woman"], count),
+                    seconds,
+                    rng.choice(CAMERAS, count),
+                )
+            ]
+            db.add_emotions(rows)
+            inserted += count
+        day += datetime.timedelta(days=1)
+    elapsed = time.perf_counter() - start
+    db.close()
+    print(
+        f"Inserted {inserted} rows in {elapsed:.1f} s ({inserted / elapsed:.0f} rows/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("pipeline", help="run the pipeline at target rates")
+    load.add_argument("--faces-dir", required=True, help="directory of face images")
+    load.add_argument("--faces", type=int, default=4, help="faces per frame")
+    load.add_argument(
+        "--rates", default="1,2,5,10", help="target frames/s to step through"
+    )
+    load.add_argument("--seconds", type=float, default=20.0, help="duration per rate")
+    load.add_argument("--stop-when-saturated", action="store_true")
+    load.add_argument(
+        "--detector",
+        default="mtcnn",
+        help="face detector, or 'placed' to analyze the placed boxes without detection",
+    )
+    load.add_argument("--analyzer", choices=["deepface", "torch"], default="torch")
+    load.add_argument("--width", type=int, default=1280)
+    load.add_argument("--height", type=int, default=720)
+    load.add_argument("--face-size", type=int, default=160)
+    load.add_argument("--database", help="database file (default: a temporary one)")
+    load.set_defaults(func=pipeline)
+
+    fill = commands.add_parser("populate", help="fill a database with years of rows")
+    # Required, so a bare populate never writes into the kiosk's live database
+    fill.add_argument("--database", required=True, help="database file to fill")
+    fill.add_argument("--years", type=float, default=3.0)
+    fill.add_argument("--rows-per-day", type=float, default=800.0)
+    fill.add_argument("--seed", type=int, default=0)
+    fill.set_defaults(func=populate)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Measures end-to-end pipeline throughput on a reproducible video source.
+
+Replays a video file, an image sequence or the synthetic generator through
+capture, blur, detection, analysis and annotation, so numbers can be compared
+across hosts without a webcam. Run from the repository root:
+
+    python -m benchmarks.pipeline_throughput --source synthetic --frames 300
+    python -m benchmarks.pipeline_throughput --source clip.mp4 --fps 15 --loop
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src import FrameProcessor
+from src.emotion_analyzer import EmotionAnalyzer
+from src.face_detection import FaceDetector
+from src.video_source import (
+    add_video_source_arguments,
+    open_video_source,
+    video_source_properties,
+)
+
+
+def run(frame_processor, face_detector, emotion_analyzer, frames):
+    timings = {
+        name: [] for name in ["capture", "blur", "detection", "analysis", "annotate"]
+    }
+    faces = 0
+    start = time.perf_counter()
+    processed = 0
+    for _ in range(frames):
+        stage_start = time.perf_counter()
+        frame = frame_processor.capture_frame()
+        timings["capture"].append(time.perf_counter() - stage_start)
+        if frame is None:
+            break
+
+        stage_start = time.perf_counter()
+        blurred_frame = frame_processor.blur_edges(frame)
+        timings["blur"].append(time.perf_counter() - stage_start)
+
+        stage_start = time.perf_counter()
+        face_boxes = face_detector.detect_faces(frame)
+        timings["detection"].append(time.perf_counter() - stage_start)
+
+        stage_start = time.perf_counter()
+        results = []
+        for box in face_boxes:
+            x, y, w, h = box["x"], box["y"], box["w"], box["h"]
+            result = emotion_analyzer.analyze_emotions(frame[y : y + h, x : x + w])
+            result.region = (x, y, w, h)
+            results.append(result)
+        timings["analysis"].append(time.perf_counter() - stage_start)
+
+        stage_start = time.perf_counter()
+        frame_processor.annotate_frame(blurred_frame, results)
+        timings["annotate"].append(time.perf_counter() - stage_start)
+
+        faces += len(results)
+        processed += 1
+    return processed, faces, time.perf_counter() - start, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default="synthetic")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--detector", default="mtcnn")
+    parser.add_argument("--analyzer", choices=["deepface", "torch"], default="torch")
+    add_video_source_arguments(parser)
+    args = parser.parse_args()
+
+    video_source = open_video_source(args.source, **video_source_properties(args))
+    frame_processor = FrameProcessor(video_source)
+    processed, faces, elapsed, timings = run(
+        frame_processor,
+        FaceDetector(model_name=args.detector),
+        EmotionAnalyzer(analyzer_name=args.analyzer),
+        args.frames,
+    )
+    frame_processor.release_resources()
+
+    print(
+        f"{processed} frames, {faces} faces in {elapsed:.2f} s: "
+        f"{processed / elapsed:.1f} frames/s, {faces / elapsed:.1f} faces/s"
+    )
+    for name, samples in timings.items():
+        if samples:
+            ms = np.asarray(samples) * 1000
+            print(
+                f"  {name:<10} p50 {np.percentile(ms, 50):7.2f} ms  "
+                f"p95 {np.percentile(ms, 95):7.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
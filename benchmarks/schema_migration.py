@@ -0,0 +1,174 @@
+"""Measures file size and query time before and after the typed-schema migration.
+
+Builds a database with the old all-text emotions table, times the old trend
+queries on it, migrates it in place by opening it with DatabaseManager and
+times the same queries through DatabaseManager. Both files are vacuumed
+before their size is taken. Run from the repository root:
+
+    python -m benchmarks.schema_migration --rows 1000000
+"""
+
+import argparse
+import datetime
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.database_manager import DatabaseManager
+
+EMOTIONS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+# The trend queries as they ran against the text schema
+LEGACY_QUERIES = {
+    "most common (month)": (
+        """
+        SELECT emotion, COUNT(emotion) FROM emotions
+        WHERE timestamp BETWEEN ? AND ? GROUP BY emotion
+        """,
+        "month",
+    ),
+    "emotion counts (month)": (
+        """
+        SELECT datetime(timestamp), emotion, COUNT(emotion) FROM emotions
+        WHERE timestamp BETWEEN ? AND ?
+        GROUP BY strftime('%Y-%m-%d %H', timestamp), emotion
+        ORDER BY timestamp, emotion
+        """,
+        "month",
+    ),
+    "happy counts (year)": (
+        """
+        SELECT datetime(timestamp), COUNT(emotion) FROM emotions
+        WHERE emotion = 'happy' AND timestamp BETWEEN ? AND ?
+        GROUP BY strftime('%Y-%m-%d %H', timestamp)
+        """,
+        "year",
+    ),
+    "trends": (
+        """
+        SELECT emotion, COUNT(emotion) FROM emotions
+        WHERE time(timestamp) BETWEEN ? AND ? GROUP BY emotion
+        """,
+        "periods",
+    ),
+}
+
+
+def create_legacy_database(path, rows, seed):
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE emotions (
+            id INTEGER PRIMARY KEY,
+            emotion TEXT,
+            age TEXT,
+            gender TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            camera_id TEXT
+        )
+        """
+    )
+    conn.execute("CREATE INDEX idx_emotions_timestamp ON emotions (timestamp)")
+    start = datetime.datetime(2023, 1, 1)
+    seconds = np.sort(rng.integers(0, 2 * 365 * 86400, rows))
+    with conn:
+        conn.executemany(
+            "INSERT INTO emotions (emotion, age, gender, timestamp, camera_id) VALUES (?, ?, ?, ?, ?)",
+            (
+                (
+                    emotion,
+                    str(age),
+                    gender,
+                    (start + datetime.timedelta(seconds=int(s))).strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    ),
+                    camera,
+                )
+                for emotion, age, gender, s, camera in zip(
+                    rng.choice(EMOTIONS, rows),
+                    rng.integers(16, 80, rows),
+                    rng.choice(["Man", "Woman"], rows),
+                    seconds,
+                    rng.choice(["entrance", "lobby"], rows),
+                )
+            ),
+        )
+    conn.execute("VACUUM")
+    conn.close()
+
+
+MONTH = (datetime.datetime(2024, 3, 1), datetime.datetime(2024, 3, 31, 23, 59, 59))
+YEAR = (datetime.datetime(2024, 1, 1), datetime.datetime(2024, 12, 31, 23, 59, 59))
+PERIODS = [
+    ("06:00:00", "12:00:00"),
+    ("12:00:01", "18:00:00"),
+    ("18:00:01", "23:59:59"),
+]
+
+
+def run_legacy(conn, query, kind):
+    bounds = {"month": [MONTH], "year": [YEAR], "periods": PERIODS}[kind]
+    for start, end in bounds:
+        conn.execute(query, (str(start), str(end))).fetchall()
+
+
+def best_of(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "emotions.db")
+        create_legacy_database(path, args.rows, args.seed)
+        size_before = os.path.getsize(path)
+
+        conn = sqlite3.connect(path)
+        before = {
+            name: best_of(lambda: run_legacy(conn, query, kind), args.repeat)
+            for name, (query, kind) in LEGACY_QUERIES.items()
+        }
+        conn.close()
+
+        start = time.perf_counter()
+        db_manager = DatabaseManager(path)
+        migration_s = time.perf_counter() - start
+        methods = {
+            "most common (month)": lambda: db_manager.get_most_common_emotion(*MONTH),
+            "emotion counts (month)": lambda: db_manager.get_emotion_counts(*MONTH),
+            "happy counts (year)": lambda: db_manager.get_happy_emotion_counts(*YEAR),
+            "trends": db_manager.get_emotion_trends,
+        }
+        after = {name: best_of(method, args.repeat) for name, method in methods.items()}
+        db_manager.close()
+        # Closing the last connection checkpoints the WAL into the file
+        size_after = os.path.getsize(path)
+
+    print(f"{args.rows} rows, migrated in {migration_s:.1f} s")
+    print(
+        f"  file size     {size_before / 2**20:8.1f} MB -> {size_after / 2**20:8.1f} MB "
+        f"({size_after / size_before:.0%})"
+    )
+    for name in LEGACY_QUERIES:
+        print(
+            f"  {name:<24} {before[name] * 1000:8.1f} ms -> {after[name] * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
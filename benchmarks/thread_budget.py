@@ -0,0 +1,152 @@
+"""Sweeps thread budgets and reports the best OpenCV/inference split for this host.
+
+Budgets can only be applied once per process (TensorFlow and the torch
+inter-op pool are fixed after they start), so every candidate runs in a fresh
+interpreter. Run from the repository root:
+
+    python -m benchmarks.thread_budget --analyzer torch
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def percentile(samples, q):
+    return float(np.percentile(np.asarray(samples) * 1000, q))
+
+
+def measure(budgets, analyzer_name, iterations):
+    """Times every pipeline stage under the given budgets."""
+    from src.runtime_config import RuntimeConfig
+
+    RuntimeConfig(**budgets).apply()
+
+    import cv2
+
+    from src.emotion_analyzer import EmotionAnalyzer
+    from src.face_detection import FaceDetector
+
+    frame = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    haar = FaceDetector(model_name="haarcascade")
+    mtcnn = FaceDetector(model_name="mtcnn")
+    analyzer = EmotionAnalyzer(analyzer_name=analyzer_name)
+    stages = {
+        "blur": lambda: cv2.GaussianBlur(frame, (99, 99), 0),
+        "haar": lambda: haar.detect_faces(frame),
+        "mtcnn": lambda: mtcnn.detect_faces(frame),
+        "analysis": lambda: analyzer.analyze_emotions(frame[120:360, 220:420]),
+    }
+    for stage in stages.values():
+        stage()
+
+    timings = {name: [] for name in stages}
+    totals = []
+    for _ in range(iterations):
+        frame_start = time.perf_counter()
+        for name, stage in stages.items():
+            start = time.perf_counter()
+            stage()
+            timings[name].append(time.perf_counter() - start)
+        totals.append(time.perf_counter() - frame_start)
+
+    result = {
+        name: {"p50_ms": percentile(t, 50), "p95_ms": percentile(t, 95)}
+        for name, t in timings.items()
+    }
+    result["total"] = {
+        "p50_ms": percentile(totals, 50),
+        "p95_ms": percentile(totals, 95),
+    }
+    return result
+
+
+def candidate_budgets(cpu_count):
+    opencv_options = sorted({1, max(1, cpu_count // 4), max(1, cpu_count // 2)})
+    for opencv in opencv_options:
+        inference_options = sorted(
+            {1, 2, max(1, cpu_count // 2), max(1, cpu_count - opencv)}
+        )
+        for inference in inference_options:
+            if inference > cpu_count:
+                continue
+            yield {
+                "opencv": opencv,
+                "torch": inference,
+                "torch_interop": 1,
+                "tf_intra": inference,
+                "tf_inter": 1,
+            }
+
+
+def run_candidate(budgets, analyzer_name, iterations):
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.thread_budget",
+            "--child",
+            json.dumps(budgets),
+            "--analyzer",
+            analyzer_name,
+            "--iterations",
+            str(iterations),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def format_spec(budgets):
+    return ",".join(f"{key}={value}" for key, value in budgets.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analyzer", choices=["deepface", "torch"], default="deepface")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = measure(json.loads(args.child), args.analyzer, args.iterations)
+        print(json.dumps(result))
+        return
+
+    cpu_count = os.cpu_count() or 1
+    print(f"{cpu_count} CPUs, analyzer={args.analyzer}")
+    best = None
+    for budgets in candidate_budgets(cpu_count):
+        result = run_candidate(budgets, args.analyzer, args.iterations)
+        if "error" in result:
+            print(f"{format_spec(budgets):<60} failed: {result['error']}")
+            continue
+        total = result["total"]
+        print(
+            f"{format_spec(budgets):<60} "
+            f"p50 {total['p50_ms']:7.1f} ms  p95 {total['p95_ms']:7.1f} ms"
+        )
+        # Rank by tail latency since jitter is what oversubscription causes
+        if best is None or total["p95_ms"] < best[1]["total"]["p95_ms"]:
+            best = (budgets, result)
+
+    if best is None:
+        print("No candidate finished")
+        return
+    print(f"\nBest split: --threads {format_spec(best[0])}")
+    for stage, stats in best[1].items():
+        print(
+            f"  {stage:<9} p50 {stats['p50_ms']:7.1f} ms  p95 {stats['p95_ms']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
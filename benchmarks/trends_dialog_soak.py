@@ -0,0 +1,77 @@
+"""Opens and closes the trends dialog many times and checks memory stays bounded.
+
+Each round opens the dialog, switches to the second tab so both figures are
+drawn, and closes it. After a warm-up, RSS, gc-tracked objects and live
+matplotlib figures are sampled; the run fails if any grows past its limit. Runs
+offscreen on a synthetic video source. Run from the repository root:
+
+    python -m benchmarks.trends_dialog_soak --rounds 2000
+"""
+
+import argparse
+import gc
+import os
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+
+from src.memory_watch import MemoryWatch
+from src.menu import EmotionApp
+from src.video_source import open_video_source
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--sample-every", type=int, default=100)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=20.0)
+    parser.add_argument("--max-object-growth", type=int, default=5000)
+    parser.add_argument("--analyzer", choices=["deepface", "torch"], default="torch")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication([])
+    emotion_app = EmotionApp(
+        analyzer_name=args.analyzer, video_source=open_video_source("synthetic")
+    )
+    # Only the dialog is soaked, not the live preview
+    emotion_app.timer.stop()
+
+    def close_dialog():
+        emotion_app.tabs.setCurrentIndex(1)
+        emotion_app.trends_window.accept()
+
+    watch = MemoryWatch()
+    for round_number in range(1, args.rounds + 1):
+        QTimer.singleShot(0, close_dialog)
+        emotion_app.show_trends_dialog()
+        if round_number >= args.warmup and round_number % args.sample_every == 0:
+            gc.collect()
+            sample = watch.sample()
+            print(
+                f"round {round_number:>6}: RSS {sample['rss_mb']:.1f} MB, "
+                f"{sample['objects']} objects, {sample['figures']} figures"
+            )
+
+    emotion_app.close()
+    app.processEvents()
+    growth = watch.growth()
+    print(
+        f"growth after warm-up: RSS {growth['rss_mb']:+.1f} MB, "
+        f"{growth['objects']:+d} objects, {growth['figures']:+d} figures"
+    )
+    failures = []
+    if growth["rss_mb"] > args.max_rss_growth_mb:
+        failures.append(f"RSS grew {growth['rss_mb']:.1f} MB")
+    if growth["objects"] > args.max_object_growth:
+        failures.append(f"{growth['objects']} objects leaked")
+    if growth["figures"] > 0:
+        failures.append(f"{growth['figures']} figures left open")
+    if failures:
+        raise SystemExit(f"FAILED: {', '.join(failures)}")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,121 @@
+import argparse
 import sys
 
 from PySide6.QtWidgets import QApplication
 
 from src.menu import EmotionApp
+from src.runtime_config import RuntimeConfig
+from src.video_source import (
+    add_video_source_arguments,
+    open_video_source,
+    video_source_properties,
+)
+from src.weight_store import WeightStore
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    ex = EmotionApp()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--analyzer",
+        choices=["deepface", "torch"],
+        default="deepface",
+        help="emotion analyzer backend; 'torch' avoids loading TensorFlow",
+    )
+    parser.add_argument(
+        "--threads",
+        help="thread budgets, e.g. opencv=1,torch=3,torch_interop=1,tf_intra=3,tf_inter=1",
+    )
+    # Only declared to reject it, unknown options are passed on to Qt
+    parser.add_argument("--capture-cpus", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--inference-cpus",
+        help="CPU list for the GUI thread, which captures and analyzes, e.g. 1-3",
+    )
+    parser.add_argument(
+        "--target-frame-ms",
+        type=int,
+        default=33,
+        help="live preview frame time the quality controller aims for",
+    )
+    parser.add_argument(
+        "--live-detection",
+        action="store_true",
+        help="draw detected face boxes on the live preview",
+    )
+    parser.add_argument(
+        "--motion-sensitivity",
+        type=float,
+        help="skip live detection unless this fraction of the scene changed, e.g. 0.01",
+    )
+    parser.add_argument(
+        "--retention-days",
+        type=int,
+        help="fold rows older than this many days into monthly archives",
+    )
+    parser.add_argument(
+        "--index-snapshot",
+        help="answer trend queries from an in-memory index snapshotted to this file",
+    )
+    parser.add_argument(
+        "--memory-watch",
+        type=float,
+        metavar="SECONDS",
+        help="log RSS, object and open-figure counts every SECONDS",
+    )
+    parser.add_argument(
+        "--result-cache",
+        type=float,
+        metavar="SECONDS",
+        help="reuse analysis results for near-identical face crops seen within SECONDS",
+    )
+    parser.add_argument(
+        "--clip-seconds",
+        type=float,
+        help="write a clip of this many seconds of preview before each capture to clips/",
+    )
+    parser.add_argument(
+        "--weights",
+        help="load model weights only from this store, see python -m src.weight_store",
+    )
+    parser.add_argument(
+        "--profile",
+        type=float,
+        metavar="SECONDS",
+        help="profile all threads for SECONDS from startup to profiles/; the P key "
+        "and SIGUSR1 start a profile of the same length (default 30) at any time",
+    )
+    add_video_source_arguments(parser)
+    parser.add_argument(
+        "--source",
+        default="0",
+        help="camera index, video file, image directory/glob or 'synthetic[:WxH]'",
+    )
+    args, qt_args = parser.parse_known_args()
+    if args.capture_cpus:
+        parser.error(
+            "--capture-cpus is only for run_cameras.py; here the camera is read "
+            "on the GUI thread, which --inference-cpus pins"
+        )
+
+    runtime_config = RuntimeConfig.from_spec(args.threads, None, args.inference_cpus)
+    runtime_config.apply()
+    # The GUI thread runs detection and analysis
+    runtime_config.pin_current_thread("inference")
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    ex = EmotionApp(
+        analyzer_name=args.analyzer,
+        target_frame_ms=args.target_frame_ms,
+        live_detection=args.live_detection,
+        video_source=open_video_source(args.source, **video_source_properties(args)),
+        retention_days=args.retention_days,
+        index_path=args.index_snapshot,
+        memory_watch_interval=args.memory_watch,
+        motion_sensitivity=args.motion_sensitivity,
+        result_cache_ttl=args.result_cache,
+        clip_seconds=args.clip_seconds,
+        weight_store=WeightStore(args.weights) if args.weights else None,
+        profile_seconds=args.profile,
+    )
+    ex.profiler.install_signal()
     ex.show()
     sys.exit(app.exec())
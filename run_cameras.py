@@ -0,0 +1,131 @@
+import argparse
+import logging
+import queue
+import time
+
+from src import DatabaseManager
+from src.capture_manager import CaptureManager
+from src.emotion_analyzer import EmotionAnalyzer
+from src.face_detection import FaceDetector
+from src.runtime_config import RuntimeConfig
+from src.sampling_profiler import SamplingProfiler
+from src.video_source import (
+    add_video_source_arguments,
+    open_video_source,
+    video_source_properties,
+)
+from src.weight_store import WeightStore
+
+
+def parse_source(spec, index):
+    """Parses "[camera_id=]source" into the camera ID and source spec."""
+    camera_id, _, source = spec.rpartition("=")
+    return camera_id or str(index), source
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Headless emotion recognition on several cameras at once."
+    )
+    parser.add_argument(
+        "--source",
+        action="append",
+        required=True,
+        help="video source as [camera_id=]source, see run.py --source; repeatable",
+    )
+    add_video_source_arguments(parser)
+    parser.add_argument("--detector", default="mtcnn")
+    parser.add_argument("--analyzer", choices=["deepface", "torch"], default="torch")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="minimum seconds between analyses of the same camera",
+    )
+    parser.add_argument(
+        "--motion-sensitivity",
+        type=float,
+        help="skip analysis unless this fraction of the scene changed, e.g. 0.01",
+    )
+    parser.add_argument(
+        "--result-cache",
+        type=float,
+        metavar="SECONDS",
+        help="reuse analysis results for near-identical face crops seen within SECONDS",
+    )
+    parser.add_argument(
+        "--batch-budget-ms",
+        type=float,
+        help="detect due frames of all cameras in batches that take about this long",
+    )
+    parser.add_argument(
+        "--weights",
+        help="load model weights only from this store, see python -m src.weight_store",
+    )
+    parser.add_argument(
+        "--profile",
+        type=float,
+        metavar="SECONDS",
+        help="profile all threads for SECONDS from startup to profiles/; SIGUSR1 "
+        "starts a profile of the same length (default 30) at any time",
+    )
+    parser.add_argument("--report-every", type=float, default=30.0)
+    parser.add_argument("--threads", help="thread budgets, see run.py")
+    parser.add_argument("--capture-cpus", help="CPU list for capture threads, e.g. 0")
+    parser.add_argument(
+        "--inference-cpus", help="CPU list for the inference worker, e.g. 1-3"
+    )
+    args = parser.parse_args()
+
+    runtime_config = RuntimeConfig.from_spec(
+        args.threads, args.capture_cpus, args.inference_cpus
+    )
+    runtime_config.apply()
+
+    properties = video_source_properties(args)
+    video_sources = {}
+    for i, spec in enumerate(args.source):
+        camera_id, source = parse_source(spec, i)
+        video_sources[camera_id] = open_video_source(source, **properties)
+    db_manager = DatabaseManager()
+    weight_store = WeightStore(args.weights) if args.weights else None
+    manager = CaptureManager(
+        video_sources,
+        FaceDetector(model_name=args.detector, weight_store=weight_store),
+        EmotionAnalyzer(
+            analyzer_name=args.analyzer,
+            cache_ttl=args.result_cache,
+            weight_store=weight_store,
+        ),
+        runtime_config=runtime_config,
+        analysis_interval=args.interval,
+        motion_sensitivity=args.motion_sensitivity,
+        batch_budget=args.batch_budget_ms / 1000 if args.batch_budget_ms else None,
+    )
+    manager.start()
+    profiler = SamplingProfiler(args.profile or SamplingProfiler.DEFAULT_SECONDS)
+    profiler.install_signal()
+    if args.profile:
+        profiler.start()
+    last_report = time.perf_counter()
+    try:
+        while True:
+            try:
+                camera_id, results = manager.results.get(timeout=1)
+            except queue.Empty:
+                # Replays without --loop end; stop once their rows are stored
+                if manager.finished():
+                    break
+            else:
+                # Writing here keeps database latency out of the inference worker
+                db_manager.add_results(results, camera_id=camera_id)
+            if time.perf_counter() - last_report >= args.report_every:
+                manager.log_throughput()
+                last_report = time.perf_counter()
+    except KeyboardInterrupt:
+        logging.info("Stopping cameras...")
+    finally:
+        profiler.stop()
+        manager.stop()
+        manager.log_throughput()
+        db_manager.close()
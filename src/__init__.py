@@ -7,10 +7,12 @@ from .database_manager import DatabaseManager
 from .emotion_texts import EmotionTexts
 from .frame_processor import FrameProcessor
 from .graph import Graph
+from .runtime_config import RuntimeConfig
 
 __all__ = [
     "DatabaseManager",
     "FrameProcessor",
     "EmotionTexts",
     "Graph",
+    "RuntimeConfig",
 ]
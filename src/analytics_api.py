@@ -0,0 +1,206 @@
+import argparse
+import datetime
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from flask import Flask, abort, jsonify, make_response, request
+
+from src.database_manager import DatabaseManager
+
+GRANULARITIES = ["day", "week", "month", "year"]
+
+
+def time_range(granularity, today=None):
+    """Returns the (start, end) datetimes the trends dialog uses for a granularity."""
+    today = today or datetime.date.today()
+    if granularity == "day":
+        return (
+            datetime.datetime.combine(today, datetime.time(6, 0)),
+            datetime.datetime.combine(today, datetime.time(18, 0)),
+        )
+    if granularity == "week":
+        start = today - datetime.timedelta(days=today.weekday())
+        return (
+            datetime.datetime.combine(start, datetime.time(6, 0)),
+            datetime.datetime.combine(
+                start + datetime.timedelta(days=4), datetime.time(18, 0)
+            ),
+        )
+    if granularity == "month":
+        start = today.replace(day=1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1) - datetime.timedelta(
+            days=1
+        )
+    elif granularity == "year":
+        start = today.replace(month=1, day=1)
+        end = today.replace(month=12, day=31)
+    else:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    return (
+        datetime.datetime.combine(start, datetime.time.min),
+        datetime.datetime.combine(end, datetime.time(23, 59, 59)),
+    )
+
+
+class AnalyticsService:
+    """Serves the trend queries with HTTP revalidation and a result cache.
+
+    Every response is tagged with the database's data version: an ETag that
+    changes with it and a Last-Modified time of when the change was first
+    seen. Clients revalidating an unchanged resource get a 304 without any
+    query running, and a changed resource is only queried once per data
+    version however many clients poll it.
+    """
+
+    CACHE_SIZE = 256
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+        # Distinguishes ETags across restarts, data_version restarts with the process
+        self.instance = uuid.uuid4().hex[:8]
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.seen_version = None
+        self.last_modified = self.file_modified_time()
+
+    def file_modified_time(self):
+        paths = [self.db_manager.database_path, self.db_manager.database_path + "-wal"]
+        mtime = max(os.path.getmtime(p) for p in paths if os.path.exists(p))
+        return datetime.datetime.fromtimestamp(mtime, datetime.timezone.utc).replace(
+            microsecond=0
+        )
+
+    def version(self):
+        """Returns the data version and the time it was first seen."""
+        version = self.db_manager.data_version()
+        with self.lock:
+            if self.seen_version is not None and version != self.seen_version:
+                self.last_modified = datetime.datetime.now(
+                    datetime.timezone.utc
+                ).replace(microsecond=0)
+            self.seen_version = version
+            return version, self.last_modified
+
+    def cached(self, key, version, compute):
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry and entry[0] == version:
+                self.cache.move_to_end(key)
+                return entry[1]
+        payload = compute()
+        with self.lock:
+            self.cache[key] = (version, payload)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.CACHE_SIZE:
+                self.cache.popitem(last=False)
+        return payload
+
+    def respond(self, key, compute):
+        version, last_modified = self.version()
+        etag = hashlib.sha1(f"{self.instance}:{version}:{key}".encode()).hexdigest()
+        if request.if_none_match:
+            not_modified = request.if_none_match.contains(etag)
+        else:
+            since = request.if_modified_since
+            not_modified = since is not None and since >= last_modified
+        if not_modified:
+            response = make_response("", 304)
+        else:
+            response = jsonify(self.cached(key, version, compute))
+        response.set_etag(etag)
+        response.last_modified = last_modified
+        response.cache_control.no_cache = True
+        return response
+
+    def requested_range(self):
+        granularity = request.args.get("granularity", "day")
+        if granularity not in GRANULARITIES:
+            abort(400, f"granularity must be one of {', '.join(GRANULARITIES)}")
+        start, end = time_range(granularity)
+        try:
+            if "start" in request.args:
+                start = datetime.datetime.fromisoformat(request.args["start"])
+            if "end" in request.args:
+                end = datetime.datetime.fromisoformat(request.args["end"])
+        except ValueError:
+            abort(400, "start and end must be ISO 8601 datetimes")
+        return start.replace(microsecond=0), end.replace(microsecond=0)
+
+    def most_common_emotion(self):
+        start, end = self.requested_range()
+        return self.respond(
+            f"most-common:{start}:{end}",
+            lambda: {
+                "start": str(start),
+                "end": str(end),
+                "emotion": self.db_manager.get_most_common_emotion(start, end),
+            },
+        )
+
+    def emotion_counts(self):
+        start, end = self.requested_range()
+        return self.respond(
+            f"emotion-counts:{start}:{end}",
+            lambda: {
+                "start": str(start),
+                "end": str(end),
+                "counts": [
+                    {"hour": hour, "emotion": emotion, "count": count}
+                    for hour, emotion, count in self.db_manager.get_emotion_counts(
+                        start, end
+                    )
+                ],
+            },
+        )
+
+    def happy_counts(self):
+        start, end = self.requested_range()
+        return self.respond(
+            f"happy-counts:{start}:{end}",
+            lambda: {
+                "start": str(start),
+                "end": str(end),
+                "counts": [
+                    {"hour": hour, "count": count}
+                    for hour, count in self.db_manager.get_happy_emotion_counts(
+                        start, end
+                    )
+                ],
+            },
+        )
+
+    def emotion_trends(self):
+        return self.respond(
+            "emotion-trends",
+            lambda: {"trends": self.db_manager.get_emotion_trends()},
+        )
+
+
+def create_app(db_manager=None):
+    """Creates the Flask app; serve it with e.g. gunicorn "src.analytics_api:create_app()"."""
+    db_manager = db_manager or DatabaseManager(read_only=True)
+    service = AnalyticsService(db_manager)
+    app = Flask(__name__)
+    app.add_url_rule("/api/most-common-emotion", view_func=service.most_common_emotion)
+    app.add_url_rule("/api/emotion-counts", view_func=service.emotion_counts)
+    app.add_url_rule("/api/happy-counts", view_func=service.happy_counts)
+    app.add_url_rule("/api/emotion-trends", view_func=service.emotion_trends)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local HTTP API for emotion trends.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--database", default=DatabaseManager.DATABASE_PATH)
+    parser.add_argument(
+        "--index-snapshot", help="answer queries from an in-memory index"
+    )
+    args = parser.parse_args()
+    db_manager = DatabaseManager(
+        args.database, read_only=True, index_path=args.index_snapshot
+    )
+    create_app(db_manager).run(host=args.host, port=args.port, threaded=True)
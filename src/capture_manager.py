@@ -0,0 +1,276 @@
+import logging
+import queue
+import threading
+import time
+
+from src.face_detection.batch_sizer import BatchSizer
+from src.face_result import FaceBatch
+from src.motion_gate import MotionGate
+
+
+class CameraStream:
+    """Reads one video source on its own thread, keeping only the latest frame.
+
+    Older frames are overwritten rather than queued, so a slow inference
+    worker never builds up latency for this camera. The thread stops when a
+    replay ends; a camera that cannot be reopened is retried with a growing
+    delay.
+    """
+
+    RETRY_DELAY = 0.5
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(self, camera_id, video_source, runtime_config=None):
+        self.camera_id = camera_id
+        self.video_source = video_source
+        self.runtime_config = runtime_config
+        self.lock = threading.Lock()
+        self.latest_frame = None
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.ended = False
+        self.running = False
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self.run, name=f"capture-{camera_id}", daemon=True
+        )
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.stop_event.set()
+        self.thread.join(timeout=2)
+        self.video_source.release()
+
+    def run(self):
+        if self.runtime_config:
+            self.runtime_config.pin_current_thread("capture")
+        delay = self.RETRY_DELAY
+        while self.running:
+            try:
+                frame = self.video_source.read()
+            except RuntimeError as e:
+                logging.error(f"Camera {self.camera_id}: {e}, retrying in {delay:g} s")
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, self.MAX_RETRY_DELAY)
+                continue
+            delay = self.RETRY_DELAY
+            if frame is None and self.video_source.ended:
+                logging.info(f"Camera {self.camera_id}: end of stream")
+                self.ended = True
+                return
+            if frame is None:
+                logging.warning(f"Camera {self.camera_id}: failed to grab frame")
+                time.sleep(0.1)
+                continue
+            with self.lock:
+                if self.latest_frame is not None:
+                    self.frames_dropped += 1
+                self.latest_frame = frame
+                self.frames_captured += 1
+
+    def take_frame(self):
+        """Returns the latest unprocessed frame, or None if there is none."""
+        with self.lock:
+            frame, self.latest_frame = self.latest_frame, None
+        return frame
+
+
+class CaptureManager:
+    """Runs one capture thread per source and a single shared inference worker.
+
+    The worker visits the cameras round-robin and analyzes the latest frame of
+    each, so every camera gets an equal share of inference however fast its
+    device delivers frames. Results are tagged with the camera ID and put on
+    the results queue for the thread that owns the database.
+
+    With a motion_sensitivity, each camera gets a MotionGate that checks
+    every captured frame, and only frames with motion are analyzed, at most
+    once per analysis_interval.
+
+    With a batch_budget in seconds, the frames due in a round are detected
+    in batches sized by a BatchSizer so that one detection pass stays
+    within the budget.
+    """
+
+    def __init__(
+        self,
+        video_sources,
+        face_detector,
+        emotion_analyzer,
+        runtime_config=None,
+        analysis_interval=1.0,
+        motion_sensitivity=None,
+        batch_budget=None,
+    ):
+        self.face_detector = face_detector
+        self.emotion_analyzer = emotion_analyzer
+        self.runtime_config = runtime_config
+        self.analysis_interval = analysis_interval
+        self.streams = [
+            CameraStream(camera_id, video_source, runtime_config)
+            for camera_id, video_source in video_sources.items()
+        ]
+        self.results = queue.Queue()
+        self.frames_analyzed = {stream.camera_id: 0 for stream in self.streams}
+        self.faces_analyzed = {stream.camera_id: 0 for stream in self.streams}
+        self.last_analyzed = {stream.camera_id: 0.0 for stream in self.streams}
+        self.motion_gates = {
+            stream.camera_id: MotionGate(motion_sensitivity)
+            for stream in self.streams
+            if motion_sensitivity is not None
+        }
+        self.batch_sizer = BatchSizer(batch_budget) if batch_budget else None
+        self.batches_detected = 0
+        self.running = False
+        self.started_at = None
+        self.worker = threading.Thread(target=self.run, name="inference", daemon=True)
+
+    def start(self):
+        self.running = True
+        self.started_at = time.perf_counter()
+        for stream in self.streams:
+            stream.start()
+        self.worker.start()
+
+    def stop(self):
+        self.running = False
+        self.worker.join(timeout=10)
+        for stream in self.streams:
+            stream.stop()
+
+    def run(self):
+        if self.runtime_config:
+            self.runtime_config.pin_current_thread("inference")
+        while self.running:
+            if self.streams_exhausted():
+                logging.info("All sources ended, stopping the inference worker")
+                return
+            due = self.take_due_frames()
+            size = self.batch_sizer.size if self.batch_sizer else 1
+            for i in range(0, len(due), size):
+                self.analyze_batch(due[i : i + size])
+            if not due:
+                time.sleep(0.005)
+
+    def streams_exhausted(self):
+        """Returns whether every source ended and its last frame was taken."""
+        return all(
+            stream.ended and stream.latest_frame is None for stream in self.streams
+        )
+
+    def finished(self):
+        """Returns whether the worker stopped because every source ended."""
+        return self.started_at is not None and not self.worker.is_alive()
+
+    def take_due_frames(self):
+        """Returns (camera_id, frame) for every camera due for analysis."""
+        due = []
+        for stream in self.streams:
+            gate = self.motion_gates.get(stream.camera_id)
+            now = time.perf_counter()
+            waiting = (
+                now - self.last_analyzed[stream.camera_id] < self.analysis_interval
+            )
+            # A gate sees every frame, so its background learns at the capture
+            # rate it is tuned for; the interval only limits what is analyzed
+            if waiting and not gate:
+                continue
+            frame = stream.take_frame()
+            if frame is None:
+                continue
+            if gate and not gate.has_motion(frame):
+                continue
+            if waiting:
+                continue
+            self.last_analyzed[stream.camera_id] = now
+            due.append((stream.camera_id, frame))
+        return due
+
+    def analyze_batch(self, batch):
+        frames = [frame for _, frame in batch]
+        if self.batch_sizer:
+            start = time.perf_counter()
+            batch_boxes = self.face_detector.detect_faces_batch(frames)
+            self.batch_sizer.update(len(frames), time.perf_counter() - start)
+        else:
+            batch_boxes = [self.face_detector.detect_faces(frame) for frame in frames]
+        self.batches_detected += 1
+        for (camera_id, frame), boxes in zip(batch, batch_boxes):
+            results = self.analyze_faces(camera_id, frame, boxes)
+            self.frames_analyzed[camera_id] += 1
+            self.faces_analyzed[camera_id] += len(results)
+            if results:
+                self.results.put((camera_id, results))
+
+    def analyze_faces(self, camera_id, frame, boxes):
+        """Returns the faces of a frame as one FaceBatch for the results queue."""
+        results = []
+        for box in boxes:
+            x, y, w, h = box["x"], box["y"], box["w"], box["h"]
+            result = self.emotion_analyzer.analyze_emotions(frame[y : y + h, x : x + w])
+            result.region = (x, y, w, h)
+            result.camera_id = camera_id
+            results.append(result)
+        return FaceBatch.from_results(results)
+
+    def throughput(self):
+        """Returns captured/analyzed frames per second for each camera and overall."""
+        elapsed = max(time.perf_counter() - (self.started_at or 0.0), 1e-9)
+        cameras = {
+            stream.camera_id: {
+                "captured_fps": stream.frames_captured / elapsed,
+                "dropped_frames": stream.frames_dropped,
+                "analyzed_fps": self.frames_analyzed[stream.camera_id] / elapsed,
+                "faces_per_s": self.faces_analyzed[stream.camera_id] / elapsed,
+                "motion_skipped": self.motion_skipped(stream.camera_id),
+            }
+            for stream in self.streams
+        }
+        overall = {
+            key: sum(camera[key] for camera in cameras.values())
+            for key in ["captured_fps", "analyzed_fps", "faces_per_s"]
+        }
+        cache = getattr(self.emotion_analyzer, "cache", None)
+        if cache:
+            overall["cache_hits"] = cache.hits
+            overall["cache_misses"] = cache.misses
+        if self.batch_sizer:
+            overall["frames_per_batch"] = sum(self.frames_analyzed.values()) / max(
+                self.batches_detected, 1
+            )
+        return {"cameras": cameras, "overall": overall}
+
+    def motion_skipped(self, camera_id):
+        gate = self.motion_gates.get(camera_id)
+        return gate.frames_skipped if gate else 0
+
+    def log_throughput(self):
+        report = self.throughput()
+        for camera_id, stats in report["cameras"].items():
+            logging.info(
+                f"Camera {camera_id}: captured {stats['captured_fps']:.1f} fps, "
+                f"analyzed {stats['analyzed_fps']:.2f} fps, "
+                f"{stats['faces_per_s']:.2f} faces/s, "
+                f"{stats['dropped_frames']} frames dropped, "
+                f"{stats['motion_skipped']} skipped without motion"
+            )
+        overall = report["overall"]
+        logging.info(
+            f"All cameras: captured {overall['captured_fps']:.1f} fps, "
+            f"analyzed {overall['analyzed_fps']:.2f} fps, "
+            f"{overall['faces_per_s']:.2f} faces/s"
+            + (
+                f", {overall['cache_hits']} cache hits / {overall['cache_misses']} misses"
+                if "cache_hits" in overall
+                else ""
+            )
+            + (
+                f", {overall['frames_per_batch']:.1f} frames per detection batch"
+                if "frames_per_batch" in overall
+                else ""
+            )
+        )
@@ -0,0 +1,149 @@
+import datetime
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+class ClipRecorder:
+    """Keeps the last few seconds of frames and writes them to clips on demand.
+
+    Frames are downscaled into a ring of preallocated slots, at most fps per
+    second, so memory is fixed by seconds, fps and width and does not grow
+    however long the kiosk runs. save_clip() only queues a request: a
+    background thread waits post_seconds for the frames after the trigger,
+    copies the clip out of the ring into a second preallocated buffer and
+    encodes it, so neither the capture nor the GUI thread waits for the
+    encoder. Requests that arrive while a clip is being encoded queue up
+    behind it.
+    """
+
+    def __init__(
+        self,
+        seconds=5.0,
+        post_seconds=0.0,
+        fps=15.0,
+        width=480,
+        output_dir="clips",
+        fourcc="mp4v",
+    ):
+        self.seconds = seconds
+        self.post_seconds = post_seconds
+        self.fps = fps
+        self.width = width
+        self.output_dir = Path(output_dir)
+        self.fourcc = fourcc
+        self.capacity = max(1, int(round((seconds + post_seconds) * fps)))
+        # Allocated on the first frame, once the aspect ratio is known
+        self.frames = None
+        self.staging = None
+        self.times = np.full(self.capacity, -np.inf)
+        self.next_slot = 0
+        self.last_push = -np.inf
+        self.lock = threading.Lock()
+        self.requests = queue.Queue()
+        self.clips_written = 0
+        self.thread = None
+
+    def allocate(self, frame):
+        h, w = frame.shape[:2]
+        height = max(2, round(h * self.width / w) // 2 * 2)
+        self.frames = np.zeros((self.capacity, height, self.width, 3), np.uint8)
+        self.staging = np.zeros_like(self.frames)
+
+    def push(self, frame, force=False):
+        """Stores a frame in the ring unless one was stored within 1 / fps."""
+        now = time.monotonic()
+        if not force and now - self.last_push < 1.0 / self.fps:
+            return False
+        with self.lock:
+            if self.frames is None:
+                self.allocate(frame)
+            slot = self.frames[self.next_slot]
+            cv2.resize(
+                frame,
+                (slot.shape[1], slot.shape[0]),
+                dst=slot,
+                interpolation=cv2.INTER_AREA,
+            )
+            self.times[self.next_slot] = now
+            self.next_slot = (self.next_slot + 1) % self.capacity
+        self.last_push = now
+        return True
+
+    def save_clip(self, path=None):
+        """Queues a clip of the seconds before and post_seconds after now.
+
+        Returns the path the clip will be written to.
+        """
+        if path is None:
+            stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            path = self.output_dir / f"clip_{stamp}.mp4"
+        self.requests.put((time.monotonic(), Path(path)))
+        return Path(path)
+
+    def snapshot(self, start, end):
+        """Copies the frames stored between start and end into staging, oldest first."""
+        with self.lock:
+            if self.frames is None:
+                return 0
+            order = np.roll(np.arange(self.capacity), -self.next_slot)
+            times = self.times[order]
+            selected = order[(times >= start) & (times <= end)]
+            np.take(
+                self.frames,
+                selected,
+                axis=0,
+                out=self.staging[: len(selected)],
+                mode="clip",
+            )
+        return len(selected)
+
+    def encode(self, path, count):
+        height, width = self.staging.shape[1:3]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        writer = cv2.VideoWriter(
+            str(path), cv2.VideoWriter_fourcc(*self.fourcc), self.fps, (width, height)
+        )
+        if not writer.isOpened():
+            logging.error(f"Could not open {path} for writing")
+            return
+        try:
+            for frame in self.staging[:count]:
+                writer.write(frame)
+        finally:
+            writer.release()
+        self.clips_written += 1
+        logging.info(f"Wrote {count} frames to {path}")
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            triggered_at, path = request
+            end = triggered_at + self.post_seconds
+            time.sleep(max(0.0, end - time.monotonic()))
+            count = self.snapshot(triggered_at - self.seconds, end)
+            if count:
+                self.encode(path, count)
+            else:
+                logging.warning(f"No frames recorded for {path}")
+
+    def start(self):
+        """Starts the background encoder thread."""
+        self.thread = threading.Thread(
+            target=self.run, name="clip-encoder", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Finishes the queued clips and stops the encoder thread."""
+        if self.thread:
+            self.requests.put(None)
+            self.thread.join()
+            self.thread = None
@@ -1,123 +1,758 @@
+import logging
+import os
+import queue
 import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from src.emotion_index import EmotionIndex, covers_whole_hours, seconds_of
+from src.emotion_scores import (
+    EMOTION_LABELS,
+    GENDER_LABELS,
+    decode_scores,
+    encode_scores,
+)
+from src.face_result import FaceBatch
+
+# STRICT tables reject values of the wrong type; needs SQLite 3.37
+STRICT = "STRICT" if sqlite3.sqlite_version_info >= (3, 37, 0) else ""
+
+SCHEMA = [
+    # Lookup tables dictionary-encode the repeated labels as small integers;
+    # emotion and gender codes follow the score vector order
+    "CREATE TABLE IF NOT EXISTS emotion_labels (code INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE) {strict}",
+    "CREATE TABLE IF NOT EXISTS gender_labels (code INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE) {strict}",
+    "CREATE TABLE IF NOT EXISTS camera_labels (code INTEGER PRIMARY KEY, label TEXT NOT NULL UNIQUE) {strict}",
+    "INSERT OR IGNORE INTO emotion_labels (code, label) VALUES "
+    + ", ".join(f"({code}, '{label}')" for code, label in enumerate(EMOTION_LABELS)),
+    "INSERT OR IGNORE INTO gender_labels (code, label) VALUES "
+    + ", ".join(f"({code}, '{label}')" for code, label in enumerate(GENDER_LABELS)),
+    # ts is in Unix epoch seconds, UTC like CURRENT_TIMESTAMP. The table keeps
+    # its rowid: id is the watermark incremental readers page by, and ts is
+    # served by the covering index instead of by clustering.
+    """
+    CREATE TABLE IF NOT EXISTS emotion_events (
+        id INTEGER PRIMARY KEY,
+        ts INTEGER NOT NULL,
+        emotion INTEGER,
+        gender INTEGER,
+        age INTEGER,
+        camera INTEGER,
+        emotion_scores BLOB,
+        gender_scores BLOB
+    ) {strict}
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_emotion_events_ts ON emotion_events (ts, emotion)",
+    # The emotions view keeps the old text columns for ad-hoc SQL, exports
+    # and other writers
+    """
+    CREATE VIEW IF NOT EXISTS emotions AS
+    SELECT e.id, el.label AS emotion, e.age, gl.label AS gender,
+        datetime(e.ts, 'unixepoch') AS timestamp, cl.label AS camera_id,
+        e.emotion_scores, e.gender_scores
+    FROM emotion_events e
+    LEFT JOIN emotion_labels el ON el.code = e.emotion
+    LEFT JOIN gender_labels gl ON gl.code = e.gender
+    LEFT JOIN camera_labels cl ON cl.code = e.camera
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS emotions_insert INSTEAD OF INSERT ON emotions
+    BEGIN
+        INSERT OR IGNORE INTO emotion_labels (label) SELECT NEW.emotion WHERE NEW.emotion IS NOT NULL;
+        INSERT OR IGNORE INTO gender_labels (label) SELECT NEW.gender WHERE NEW.gender IS NOT NULL;
+        INSERT OR IGNORE INTO camera_labels (label) SELECT NEW.camera_id WHERE NEW.camera_id IS NOT NULL;
+        INSERT INTO emotion_events
+            (id, ts, emotion, gender, age, camera, emotion_scores, gender_scores)
+        VALUES (
+            NEW.id,
+            COALESCE(CAST(strftime('%s', NEW.timestamp) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER)),
+            (SELECT code FROM emotion_labels WHERE label = NEW.emotion),
+            (SELECT code FROM gender_labels WHERE label = NEW.gender),
+            CAST(NEW.age AS INTEGER),
+            (SELECT code FROM camera_labels WHERE label = NEW.camera_id),
+            NEW.emotion_scores,
+            NEW.gender_scores
+        );
+    END
+    """,
+]
+
+INSERT_EVENT = """
+    INSERT INTO emotion_events
+        (ts, emotion, gender, age, camera, emotion_scores, gender_scores)
+    VALUES (
+        COALESCE(CAST(strftime('%s', ?) AS INTEGER), CAST(strftime('%s', 'now') AS INTEGER)),
+        ?, ?, CAST(? AS INTEGER), ?, ?, ?
+    )
+"""
 
 
 class DatabaseManager:
+    """Stores and queries emotion rows.
+
+    All writes go through one connection serialized by a lock, and queries
+    borrow connections from a pool of read-only connections. The database
+    runs in WAL mode, so readers never block the writer or each other and
+    every method can be called from any thread. From asyncio, run them with
+    asyncio.to_thread.
+
+    With an index_path, the trend queries are answered from an in-memory
+    EmotionIndex of hourly counts, kept in step with inserts and snapshotted
+    to index_path on close.
+
+    Rows live in emotion_events with integer codes for the labels (see the
+    *_labels lookup tables), an INTEGER age and an epoch-seconds timestamp.
+    A database with the old all-text emotions table is migrated in place on
+    first open; emotions remains as a view with the old columns.
+    """
+
     DATABASE_PATH = "emotions.db"
+    # Monthly archives of folded history, next to the database file
+    ARCHIVE_DIR = "archive"
+    READER_POOL_SIZE = 4
+    # Seconds a writer waits for another connection's write lock, e.g. while
+    # RetentionManager folds a day of rows, before an insert fails
+    BUSY_TIMEOUT = 30
+    # Periods of get_emotion_trends as first and last hour of day. Whole
+    # hours, so raw rows and hourly archive counts fall in the same period.
+    TREND_PERIODS = [("Morning", 6, 11), ("Afternoon", 12, 17), ("Evening", 18, 23)]
+    LABEL_TABLES = {
+        "emotion": "emotion_labels",
+        "gender": "gender_labels",
+        "camera_id": "camera_labels",
+    }
 
-    def __init__(self):
-        self.conn = self.initialize_database()
-        self.cursor = self.conn.cursor()
-        self.setup_database()
+    def __init__(
+        self,
+        database_path=None,
+        reader_pool_size=None,
+        read_only=False,
+        index_path=None,
+    ):
+        self.database_path = database_path or self.DATABASE_PATH
+        self.write_lock = threading.Lock()
+        # Label codes known to the writer, filled as labels are first written
+        self.label_codes = {kind: {} for kind in self.LABEL_TABLES}
+        # Read-only managers (e.g. the analytics API) never open the writer
+        self.conn = None
+        if not read_only:
+            self.conn = self.initialize_database()
+            self.setup_database()
+        self.readers = queue.Queue()
+        for _ in range(reader_pool_size or self.READER_POOL_SIZE):
+            self.readers.put(self.connect_reader())
+        self.version_lock = threading.Lock()
+        self.version_conn = self.connect_reader()
+        self.index_path = index_path
+        self.emotion_index = self.load_index() if index_path else None
+        self.index_version = None
 
     def initialize_database(self):
-        """Initializes the SQLite database connection."""
+        """Initializes the SQLite writer connection in WAL mode."""
         try:
-            conn = sqlite3.connect(self.DATABASE_PATH)
+            conn = sqlite3.connect(
+                self.database_path, timeout=self.BUSY_TIMEOUT, check_same_thread=False
+            )
+            # Before WAL mode writes the header, so a new file starts with it;
+            # setup_database converts an existing file
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
             return conn
-        except sqlite3.Error as e:
-            print(f"Database connection error: {e}")
-            exit()
+        except sqlite3.Error:
+            logging.exception(f"Could not open the database {self.database_path}")
+            raise
+
+    def connect_reader(self):
+        """Opens a read-only connection for the reader pool."""
+        uri = f"{Path(self.database_path).resolve().as_uri()}?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+    @contextmanager
+    def writer(self):
+        """Holds the single writer connection; commits when the block succeeds."""
+        with self.write_lock:
+            try:
+                with self.conn:
+                    yield self.conn
+            except Exception:
+                # Labels added by the rolled back transaction are gone again
+                self.label_codes = {kind: {} for kind in self.LABEL_TABLES}
+                raise
+
+    @contextmanager
+    def reader(self):
+        """Borrows a cursor on a pooled read-only connection."""
+        conn = self.readers.get()
+        try:
+            yield conn.cursor()
+        finally:
+            self.readers.put(conn)
+
+    def data_version(self):
+        """Returns a counter that changes whenever any connection commits.
+
+        PRAGMA data_version only reflects commits by other connections, so
+        it is read from a dedicated connection that never writes.
+        """
+        with self.version_lock:
+            return self.version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_last_event_id(self):
+        """Returns the id of the newest row, the watermark for get_hourly_counts_since."""
+        with self.reader() as cursor:
+            cursor.execute("SELECT MAX(id) FROM emotion_events")
+            return cursor.fetchone()[0] or 0
+
+    def get_hourly_counts_since(self, last_id, ts_range=None):
+        """Counts the rows inserted after last_id per epoch hour and emotion.
+
+        Returns (new watermark, [(epoch hour, emotion, count)]). Ids only
+        grow, so a reader that keeps the watermark sees every row once.
+        With ts_range, only rows with first <= ts <= last are counted, the
+        exact-timestamp test of the trend queries; the watermark still
+        passes the rows outside it.
+        """
+        first, last = ts_range or (-(2**63), 2**63 - 1)
+        with self.reader() as cursor:
+            cursor.execute(
+                """
+                SELECT e.ts / 3600, l.label, SUM(e.ts BETWEEN ? AND ?), MAX(e.id)
+                FROM emotion_events e
+                LEFT JOIN emotion_labels l ON l.code = e.emotion
+                WHERE e.id > ?
+                GROUP BY e.ts / 3600, e.emotion
+            """,
+                (first, last, last_id),
+            )
+            rows = cursor.fetchall()
+        watermark = max([last_id] + [row[3] for row in rows])
+        return watermark, [row[:3] for row in rows if row[1] is not None and row[2]]
+
+    def load_index(self):
+        """Loads the index snapshot, or builds the index with one full scan."""
+        index = None
+        if os.path.exists(self.index_path):
+            try:
+                index = EmotionIndex.load(self.index_path)
+            except (OSError, ValueError, KeyError) as e:
+                logging.warning(f"Rebuilding the index, the snapshot is unusable: {e}")
+        if index is None:
+            index = EmotionIndex()
+            index.build(self)
+        index.catch_up(self)
+        return index
+
+    def refresh_index(self):
+        """Returns the index after catching up on commits by other connections."""
+        version = self.data_version()
+        if version != self.index_version:
+            self.emotion_index.catch_up(self)
+            self.index_version = version
+        return self.emotion_index
+
+    def index_for(self, start_time, end_time):
+        """Returns the index if it answers start_time..end_time exactly, else None.
+
+        The index counts whole hours, so other ranges go to SQL, which
+        compares ts to the exact bounds.
+        """
+        if self.emotion_index and covers_whole_hours(start_time, end_time):
+            return self.refresh_index()
+        return None
 
     def setup_database(self):
-        """Sets up the emotions table in the database."""
+        """Sets up the typed schema, migrating a legacy emotions table in place.
+
+        Also switches the database to incremental auto-vacuum, which
+        RetentionManager uses to return the pages of folded rows. A file
+        created in another mode needs a one-time VACUUM for it.
+        """
         try:
-            self.cursor.execute(
+            with self.writer() as conn:
+                conn.execute("BEGIN")
+                (legacy,) = conn.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'emotions'"
+                ).fetchone()
+                if legacy:
+                    conn.execute("ALTER TABLE emotions RENAME TO emotions_legacy")
+                for statement in SCHEMA:
+                    conn.execute(statement.format(strict=STRICT))
+                if legacy:
+                    migrated = self.migrate_legacy(conn)
+            with self.write_lock:
+                (auto_vacuum,) = self.conn.execute("PRAGMA auto_vacuum").fetchone()
+                if auto_vacuum != 2:
+                    logging.info(
+                        "Enabling incremental auto-vacuum, running a one-time VACUUM"
+                    )
+                if legacy or auto_vacuum != 2:
+                    # Rebuild the file so the space of the text rows is returned
+                    # and the auto-vacuum mode takes effect
+                    self.conn.execute("VACUUM")
+            if legacy:
+                logging.info(f"Migrated {migrated} emotion rows to the typed schema")
+        except sqlite3.Error:
+            logging.exception(f"Could not set up the database {self.database_path}")
+            raise
+
+    def migrate_legacy(self, conn):
+        """Copies the rows of the renamed legacy table into emotion_events."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(emotions_legacy)")}
+        # Older databases lack camera_id and the score vectors
+        camera_id, emotion_scores, gender_scores = (
+            f"o.{name}" if name in columns else "NULL"
+            for name in ["camera_id", "emotion_scores", "gender_scores"]
+        )
+        for kind, table in self.LABEL_TABLES.items():
+            source = camera_id if kind == "camera_id" else f"o.{kind}"
+            if source != "NULL":
+                conn.execute(
+                    f"""
+                    INSERT OR IGNORE INTO {table} (label)
+                    SELECT DISTINCT {source} FROM emotions_legacy o
+                    WHERE {source} IS NOT NULL
                 """
-                CREATE TABLE IF NOT EXISTS emotions (
-                    id INTEGER PRIMARY KEY,
-                    emotion TEXT,
-                    age TEXT,
-                    gender TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
-            """
-            )
-            self.conn.commit()
-        except sqlite3.Error as e:
-            print(f"Database setup error: {e}")
-            exit()
+        migrated = conn.execute(
+            f"""
+            INSERT INTO emotion_events
+                (id, ts, emotion, gender, age, camera, emotion_scores, gender_scores)
+            SELECT o.id,
+                COALESCE(CAST(strftime('%s', o.timestamp) AS INTEGER), 0),
+                el.code, gl.code, CAST(o.age AS INTEGER), cl.code,
+                {emotion_scores}, {gender_scores}
+            FROM emotions_legacy o
+            LEFT JOIN emotion_labels el ON el.label = o.emotion
+            LEFT JOIN gender_labels gl ON gl.label = o.gender
+            LEFT JOIN camera_labels cl ON cl.label = {camera_id}
+            ORDER BY o.id
+        """
+        ).rowcount
+        conn.execute("DROP TABLE emotions_legacy")
+        return migrated
+
+    def label_code(self, conn, kind, label):
+        """Returns the code of a label, adding it to its lookup table when new.
+
+        Runs on the writer connection, under the writer lock.
+        """
+        if label is None:
+            return None
+        codes = self.label_codes[kind]
+        if label not in codes:
+            table = self.LABEL_TABLES[kind]
+            conn.execute(f"INSERT OR IGNORE INTO {table} (label) VALUES (?)", (label,))
+            (codes[label],) = conn.execute(
+                f"SELECT code FROM {table} WHERE label = ?", (label,)
+            ).fetchone()
+        return codes[label]
 
-    def add_emotion(self, emotion, age, gender):
-        """Inserts emotion data into the database."""
+    def encode_row(
+        self,
+        conn,
+        emotion,
+        age,
+        gender,
+        timestamp,
+        camera_id,
+        emotion_scores=None,
+        gender_scores=None,
+    ):
+        return (
+            timestamp,
+            self.label_code(conn, "emotion", emotion),
+            self.label_code(conn, "gender", gender),
+            age,
+            self.label_code(conn, "camera_id", camera_id),
+            emotion_scores,
+            gender_scores,
+        )
+
+    def add_emotion(
+        self,
+        emotion,
+        age,
+        gender,
+        camera_id=None,
+        emotion_scores=None,
+        gender_scores=None,
+    ):
+        """Inserts emotion data into the database.
+
+        emotion_scores and gender_scores are the analyzer's {label: percent}
+        dicts; they are stored as float16 blobs, see src.emotion_scores.
+        """
         try:
-            self.cursor.execute(
-                "INSERT INTO emotions (emotion, age, gender) VALUES (?, ?, ?)",
-                (emotion, age, gender),
-            )
-            self.conn.commit()
-        except sqlite3.Error as e:
-            print(f"Error inserting data into database: {e}")
+            with self.writer() as conn:
+                row_id = conn.execute(
+                    INSERT_EVENT,
+                    self.encode_row(
+                        conn,
+                        emotion,
+                        age,
+                        gender,
+                        None,
+                        camera_id,
+                        encode_scores(emotion_scores, EMOTION_LABELS),
+                        encode_scores(gender_scores, GENDER_LABELS),
+                    ),
+                ).lastrowid
+            if self.emotion_index:
+                self.emotion_index.add(emotion, row_id=row_id)
+        except sqlite3.Error:
+            logging.exception("Error inserting data into the database")
+
+    def add_emotions(self, rows):
+        """Inserts (emotion, age, gender, timestamp, camera_id) rows in one transaction.
+
+        Rows may carry two more items, the encoded emotion and gender score
+        blobs.
+        """
+        try:
+            with self.writer() as conn:
+                conn.executemany(
+                    INSERT_EVENT, (self.encode_row(conn, *row) for row in rows)
+                )
+            if self.emotion_index:
+                self.emotion_index.catch_up(self)
+        except sqlite3.Error:
+            logging.exception("Error inserting data into the database")
+
+    def add_results(self, results, camera_id=None):
+        """Inserts analyzer results with their score vectors in one transaction.
+
+        results is a FaceBatch or a list of FaceResults. Without camera_id,
+        each face's own camera_id is stored.
+        """
+        batch = FaceBatch.from_results(results)
+        rows = zip(
+            batch.dominant_emotions(),
+            batch.ages.tolist(),
+            batch.dominant_genders(),
+            batch.camera_ids,
+            batch.encoded_emotion_scores(),
+            batch.encoded_gender_scores(),
+        )
+        try:
+            with self.writer() as conn:
+                conn.executemany(
+                    INSERT_EVENT,
+                    [
+                        self.encode_row(
+                            conn,
+                            emotion,
+                            age,
+                            gender,
+                            None,
+                            camera_id if camera_id is not None else face_camera_id,
+                            emotion_scores,
+                            gender_scores,
+                        )
+                        for (
+                            emotion,
+                            age,
+                            gender,
+                            face_camera_id,
+                            emotion_scores,
+                            gender_scores,
+                        ) in rows
+                    ],
+                )
+            if self.emotion_index:
+                self.emotion_index.catch_up(self)
+        except sqlite3.Error:
+            logging.exception("Error inserting data into the database")
+
+    @classmethod
+    def archive_path(cls, database_path, month):
+        """Returns the archive database file for a "YYYY-MM" month."""
+        return Path(database_path).parent / cls.ARCHIVE_DIR / f"emotions-{month}.db"
+
+    def archive_paths(self, start_time=None, end_time=None):
+        """Returns the monthly archives overlapping the time range, oldest first."""
+        archive_dir = self.archive_path(self.database_path, "").parent
+        if not archive_dir.is_dir():
+            return []
+        first = str(start_time)[:7] if start_time is not None else "0000-00"
+        last = str(end_time)[:7] if end_time is not None else "9999-99"
+        return [
+            path
+            for path in sorted(archive_dir.glob("emotions-*.db"))
+            if first <= path.stem[len("emotions-") :] <= last
+        ]
+
+    def query_archives(self, query, params, start_time=None, end_time=None):
+        """Runs a query against the emotion_counts table of each overlapping archive.
+
+        Archives are attached one at a time, on demand, so long-range queries
+        never hit SQLite's limit on attached databases.
+        """
+        rows = []
+        paths = self.archive_paths(start_time, end_time)
+        if not paths:
+            return rows
+        with self.reader() as cursor:
+            for path in paths:
+                cursor.execute(
+                    "ATTACH DATABASE ? AS archive",
+                    (f"{path.resolve().as_uri()}?mode=ro",),
+                )
+                try:
+                    cursor.execute(query, params)
+                    rows += cursor.fetchall()
+                finally:
+                    cursor.execute("DETACH DATABASE archive")
+        return rows
+
+    def most_common(self, rows):
+        counts = Counter()
+        for emotion, count in rows:
+            counts[emotion] += count
+        return counts.most_common(1)[0][0] if counts else None
 
     def get_most_common_emotion(self, start_time, end_time):
         """Retrieves the most common emotion within a specified time range."""
+        index = self.index_for(start_time, end_time)
+        if index is not None:
+            return index.most_common(start_time, end_time)
         query = """
-            SELECT emotion, COUNT(emotion) as count
-            FROM emotions
-            WHERE timestamp BETWEEN ? AND ?
+            SELECT l.label, COUNT(*) as count
+            FROM emotion_events e
+            JOIN emotion_labels l ON l.code = e.emotion
+            WHERE e.ts BETWEEN ? AND ?
+            GROUP BY e.emotion
+        """
+        with self.reader() as cursor:
+            cursor.execute(query, (seconds_of(start_time), seconds_of(end_time)))
+            rows = cursor.fetchall()
+        archive_query = """
+            SELECT emotion, SUM(count)
+            FROM archive.emotion_counts
+            WHERE emotion != '' AND hour BETWEEN ? AND ?
             GROUP BY emotion
-            ORDER BY count DESC
-            LIMIT 1
         """
-        self.cursor.execute(query, (start_time, end_time))
-        result = self.cursor.fetchone()
-        return result[0] if result else None
+        rows += self.query_archives(
+            archive_query, (start_time, end_time), start_time, end_time
+        )
+        return self.most_common(rows)
 
     def get_emotion_trends(self):
         """Retrieves the dominant emotions from morning to evening."""
-        time_ranges = [
-            ("Morning", "06:00:00", "12:00:00"),
-            ("Afternoon", "12:00:01", "18:00:00"),
-            ("Evening", "18:00:01", "23:59:59"),
-        ]
+        if self.emotion_index:
+            index = self.refresh_index()
+            return {
+                period: index.most_common_at_hours(first, last)
+                for period, first, last in self.TREND_PERIODS
+            }
         trends = {}
-        for period, start, end in time_ranges:
+        for period, first, last in self.TREND_PERIODS:
             query = """
-                SELECT emotion, COUNT(emotion) as count
-                FROM emotions
-                WHERE time(timestamp) BETWEEN ? AND ?
+                SELECT l.label, COUNT(*) as count
+                FROM emotion_events e
+                JOIN emotion_labels l ON l.code = e.emotion
+                WHERE e.ts % 86400 / 3600 BETWEEN ? AND ?
+                GROUP BY e.emotion
+            """
+            with self.reader() as cursor:
+                cursor.execute(query, (first, last))
+                rows = cursor.fetchall()
+            archive_query = """
+                SELECT emotion, SUM(count)
+                FROM archive.emotion_counts
+                WHERE emotion != ''
+                    AND CAST(strftime('%H', hour) AS INTEGER) BETWEEN ? AND ?
                 GROUP BY emotion
-                ORDER BY count DESC
-                LIMIT 1
             """
-            self.cursor.execute(query, (start, end))
-            result = self.cursor.fetchone()
-            trends[period] = result[0] if result else None
+            rows += self.query_archives(archive_query, (first, last))
+            trends[period] = self.most_common(rows)
         return trends
 
+    def get_weekday_hour_counts(self, start_time, end_time):
+        """Counts each emotion by weekday and hour of day within a time range.
+
+        Returns {emotion: 7x24 array}, rows Monday to Sunday, from one grouped
+        query over the raw rows and one per archive.
+        """
+        index = self.index_for(start_time, end_time)
+        if index is not None:
+            return index.weekday_hour_totals(start_time, end_time)
+        query = """
+            SELECT l.label, (e.ts / 86400 + 3) % 7, e.ts % 86400 / 3600, COUNT(*)
+            FROM emotion_events e
+            JOIN emotion_labels l ON l.code = e.emotion
+            WHERE e.ts BETWEEN ? AND ?
+            GROUP BY e.emotion, 2, 3
+        """
+        with self.reader() as cursor:
+            cursor.execute(query, (seconds_of(start_time), seconds_of(end_time)))
+            rows = cursor.fetchall()
+        archive_query = """
+            SELECT emotion, (CAST(strftime('%w', hour) AS INTEGER) + 6) % 7,
+                CAST(strftime('%H', hour) AS INTEGER), SUM(count)
+            FROM archive.emotion_counts
+            WHERE emotion != '' AND hour BETWEEN ? AND ?
+            GROUP BY 1, 2, 3
+        """
+        rows += self.query_archives(
+            archive_query, (start_time, end_time), start_time, end_time
+        )
+        emotions = list(dict.fromkeys(EMOTION_LABELS + [row[0] for row in rows]))
+        columns = {emotion: i for i, emotion in enumerate(emotions)}
+        grid = np.zeros((len(emotions), 7, 24), np.int64)
+        if rows:
+            labels, weekdays, hours, counts = zip(*rows)
+            np.add.at(
+                grid, ([columns[label] for label in labels], weekdays, hours), counts
+            )
+        return dict(zip(emotions, grid))
+
     def get_happy_emotion_counts(self, start_time, end_time):
         """Retrieves counts of happy emotions within a specified time range."""
+        index = self.index_for(start_time, end_time)
+        if index is not None:
+            rows = index.hourly_rows(start_time, end_time, "happy")
+            return [(hour, count) for hour, _, count in rows]
         query = """
-            SELECT datetime(timestamp), COUNT(emotion) as count
-            FROM emotions
-            WHERE emotion = 'happy' AND timestamp BETWEEN ? AND ?
-            GROUP BY strftime('%Y-%m-%d %H', timestamp)
+            SELECT datetime(e.ts / 3600 * 3600, 'unixepoch'), COUNT(*) as count
+            FROM emotion_events e
+            WHERE e.emotion = (SELECT code FROM emotion_labels WHERE label = 'happy')
+                AND e.ts BETWEEN ? AND ?
+            GROUP BY e.ts / 3600
+        """
+        with self.reader() as cursor:
+            cursor.execute(query, (seconds_of(start_time), seconds_of(end_time)))
+            rows = cursor.fetchall()
+        archive_query = """
+            SELECT hour, SUM(count)
+            FROM archive.emotion_counts
+            WHERE emotion = 'happy' AND hour BETWEEN ? AND ?
+            GROUP BY hour
+        """
+        return (
+            self.query_archives(
+                archive_query, (start_time, end_time), start_time, end_time
+            )
+            + rows
+        )
+
+    @staticmethod
+    def week_range(start_date, end_date):
+        """Returns the first and last epoch second the week query counts.
+
+        The week query keeps the original date(ts) BETWEEN start AND end
+        comparison of strings. A bound with a time of day, such as
+        "2024-01-08 06:00:00", sorts after its own date, so that start day
+        is left out and the whole end day is counted.
         """
-        self.cursor.execute(query, (start_time, end_time))
-        return self.cursor.fetchall()
+        first = seconds_of(start_date) // 86400 * 86400
+        if len(str(start_date)) > 10:
+            first += 86400
+        last = seconds_of(end_date) // 86400 * 86400 + 86399
+        return first, last
 
     def get_happy_emotion_counts_for_week(self, start_date, end_date):
         """Retrieves counts of happy emotions within the workweek."""
         query = """
-            SELECT date(timestamp), strftime('%H', timestamp) as hour, COUNT(emotion) as count
-            FROM emotions
-            WHERE emotion = 'happy' AND date(timestamp) BETWEEN ? AND ?
-            GROUP BY date(timestamp), hour
+            SELECT date(e.ts, 'unixepoch'), strftime('%H', e.ts, 'unixepoch') as hour,
+                COUNT(*) as count
+            FROM emotion_events e
+            WHERE e.emotion = (SELECT code FROM emotion_labels WHERE label = 'happy')
+                AND e.ts BETWEEN ? AND ?
+            GROUP BY e.ts / 3600
         """
-        self.cursor.execute(query, (start_date, end_date))
-        return self.cursor.fetchall()
+        with self.reader() as cursor:
+            cursor.execute(query, self.week_range(start_date, end_date))
+            rows = cursor.fetchall()
+        archive_query = """
+            SELECT date(hour), strftime('%H', hour), SUM(count)
+            FROM archive.emotion_counts
+            WHERE emotion = 'happy' AND date(hour) BETWEEN ? AND ?
+            GROUP BY hour
+        """
+        return (
+            self.query_archives(
+                archive_query, (start_date, end_date), start_date, end_date
+            )
+            + rows
+        )
 
     def get_emotion_counts(self, start_time, end_time):
         """Retrieves counts of all emotions within a specified time range."""
+        index = self.index_for(start_time, end_time)
+        if index is not None:
+            return index.hourly_rows(start_time, end_time)
+        query = """
+            SELECT datetime(e.ts / 3600 * 3600, 'unixepoch'), l.label, COUNT(*) as count
+            FROM emotion_events e
+            JOIN emotion_labels l ON l.code = e.emotion
+            WHERE e.ts BETWEEN ? AND ?
+            GROUP BY e.ts / 3600, e.emotion
+            ORDER BY e.ts / 3600, l.label
+        """
+        with self.reader() as cursor:
+            cursor.execute(query, (seconds_of(start_time), seconds_of(end_time)))
+            rows = cursor.fetchall()
+        archive_query = """
+            SELECT hour, emotion, SUM(count)
+            FROM archive.emotion_counts
+            WHERE emotion != '' AND hour BETWEEN ? AND ?
+            GROUP BY hour, emotion
+            ORDER BY hour, emotion
+        """
+        # Archived hours are always older than the raw rows
+        return (
+            self.query_archives(
+                archive_query, (start_time, end_time), start_time, end_time
+            )
+            + rows
+        )
+
+    def get_scores(self, start_time, end_time, camera_id=None):
+        """Returns the score vectors of the rows in a time range as NumPy arrays.
+
+        Returns (emotion_scores, gender_scores), float32 arrays of shape
+        (n, 7) and (n, 2) with probabilities in EMOTION_LABELS and
+        GENDER_LABELS order. Rows stored without scores are left out; archived
+        history keeps counts only.
+        """
         query = """
-            SELECT datetime(timestamp), emotion, COUNT(emotion) as count
-            FROM emotions
-            WHERE timestamp BETWEEN ? AND ?
-            GROUP BY strftime('%Y-%m-%d %H', timestamp), emotion
-            ORDER BY timestamp, emotion
+            SELECT e.emotion_scores, e.gender_scores
+            FROM emotion_events e
+            WHERE e.ts BETWEEN ? AND ? AND e.emotion_scores IS NOT NULL
         """
-        self.cursor.execute(query, (start_time, end_time))
-        return self.cursor.fetchall()
+        params = [seconds_of(start_time), seconds_of(end_time)]
+        if camera_id is not None:
+            query += " AND e.camera = (SELECT code FROM camera_labels WHERE label = ?)"
+            params.append(camera_id)
+        with self.reader() as cursor:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        emotion_blobs = [row[0] for row in rows]
+        gender_blobs = [row[1] for row in rows]
+        return (
+            decode_scores(emotion_blobs, EMOTION_LABELS),
+            decode_scores(gender_blobs, GENDER_LABELS),
+        )
+
+    def get_average_emotion_scores(self, start_time, end_time, camera_id=None):
+        """Returns the mean probability of each emotion in a time range."""
+        emotion_scores, _ = self.get_scores(start_time, end_time, camera_id)
+        if not len(emotion_scores):
+            return {}
+        means = np.nanmean(emotion_scores, axis=0)
+        return dict(zip(EMOTION_LABELS, means.tolist()))
 
     def close(self):
-        """Closes the database connection."""
-        self.conn.close()
+        """Closes the writer and the pooled reader connections."""
+        if self.emotion_index:
+            self.emotion_index.save(self.index_path)
+        while not self.readers.empty():
+            self.readers.get_nowait().close()
+        self.version_conn.close()
+        if self.conn:
+            self.conn.close()
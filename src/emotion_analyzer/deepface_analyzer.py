@@ -1,8 +1,60 @@
+import numpy as np
 from deepface import DeepFace
 
+from src.emotion_analyzer.preprocessing import prepare_face
+from src.face_result import FaceResult
+from src.weight_store import timed_load
+
 
 class DeepFaceAnalyzer:
+    """Emotion, age and gender analysis with DeepFace's Keras models.
+
+    Crops come from FaceDetector, so DeepFace's own face detection is
+    skipped: each crop is preprocessed once with prepare_face and the same
+    arrays are fed to all three models. Any other detector_backend runs
+    DeepFace.analyze on the crop as before, re-detecting the face in it.
+    """
+
+    def __init__(self, detector_backend="skip", weight_store=None):
+        self.detector_backend = detector_backend
+        if weight_store:
+            # DeepFace only downloads weights it cannot find in DEEPFACE_HOME
+            weight_store.use_for_deepface()
+        self.load_times = {}
+        # build_model caches the clients, DeepFace.analyze reuses the same ones
+        with timed_load("Emotion", self.load_times):
+            self.emotion_model = DeepFace.build_model("Emotion").model
+        with timed_load("Age", self.load_times):
+            self.age_model = DeepFace.build_model("Age").model
+        with timed_load("Gender", self.load_times):
+            self.gender_model = DeepFace.build_model("Gender").model
+        self.age_indexes = np.arange(101, dtype=np.float32)
+
     def analyze_emotions(self, face_roi):
-        return DeepFace.analyze(
-            face_roi, actions=["emotion", "age", "gender"], enforce_detection=False
+        if self.detector_backend != "skip":
+            results = DeepFace.analyze(
+                face_roi,
+                actions=["emotion", "age", "gender"],
+                detector_backend=self.detector_backend,
+                enforce_detection=False,
+            )
+            return FaceResult.from_deepface(results[0])
+
+        face, gray = prepare_face(face_roi)
+        # Calling the models directly avoids Model.predict's per-call setup,
+        # which costs more than the models themselves on a single face
+        emotion = self.emotion_model(gray[None, :, :, None], training=False)
+        emotion = np.asarray(emotion)[0]
+        face = face[None]
+        age = float(
+            np.asarray(self.age_model(face, training=False))[0] @ self.age_indexes
+        )
+        gender = np.asarray(self.gender_model(face, training=False))[0]
+
+        h, w = face_roi.shape[:2]
+        return FaceResult(
+            100 * emotion / emotion.sum(),
+            100 * gender,
+            int(age),
+            region=(0, 0, w, h),
         )
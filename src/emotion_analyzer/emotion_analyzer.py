@@ -1,12 +1,24 @@
-from src.emotion_analyzer.deepface_analyzer import DeepFaceAnalyzer
+from src.emotion_analyzer.result_cache import ResultCache
 
 
 class EmotionAnalyzer:
-    def __init__(self, analyzer_name="deepface"):
+    def __init__(self, analyzer_name="deepface", cache_ttl=None, weight_store=None):
+        # Backends are imported lazily so the torch analyzer never pulls in
+        # TensorFlow through DeepFace.
         if analyzer_name == "deepface":
-            self.analyzer = DeepFaceAnalyzer()
+            from src.emotion_analyzer.deepface_analyzer import DeepFaceAnalyzer
+
+            self.analyzer = DeepFaceAnalyzer(weight_store=weight_store)
+        elif analyzer_name == "torch":
+            from src.emotion_analyzer.torch_analyzer import TorchAnalyzer
+
+            self.analyzer = TorchAnalyzer(weight_store=weight_store)
         else:
             raise ValueError(f"Unknown analyzer name: {analyzer_name}")
+        # Reuses results for near-identical crops seen within cache_ttl seconds
+        self.cache = ResultCache(ttl=cache_ttl) if cache_ttl else None
 
     def analyze_emotions(self, face_roi):
+        if self.cache:
+            return self.cache.analyze(face_roi, self.analyzer.analyze_emotions)
         return self.analyzer.analyze_emotions(face_roi)
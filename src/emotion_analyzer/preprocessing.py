@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+
+TARGET_SIZE = (224, 224)
+EMOTION_SIZE = (48, 48)
+
+
+def letterbox(face_roi, target_size=TARGET_SIZE):
+    """Letterboxes the crop to target_size and scales it to [0, 1] like DeepFace."""
+    h, w = face_roi.shape[:2]
+    factor = min(target_size[0] / h, target_size[1] / w)
+    resized = cv2.resize(face_roi, (max(int(w * factor), 1), max(int(h * factor), 1)))
+    diff_h = target_size[0] - resized.shape[0]
+    diff_w = target_size[1] - resized.shape[1]
+    padded = np.pad(
+        resized,
+        (
+            (diff_h // 2, diff_h - diff_h // 2),
+            (diff_w // 2, diff_w - diff_w // 2),
+            (0, 0),
+        ),
+        "constant",
+    )
+    return padded.astype(np.float32) / 255.0
+
+
+def prepare_face(face_roi):
+    """Preprocesses a detected face crop once for all three models.
+
+    Returns the 224x224 color face the age and gender models take, in the
+    BGR order DeepFace feeds them, and the 48x48 grayscale face the emotion
+    model takes, derived from it the way DeepFace's emotion client does.
+    """
+    face = letterbox(face_roi)
+    gray = cv2.resize(cv2.cvtColor(face, cv2.COLOR_BGR2GRAY), EMOTION_SIZE)
+    return face, gray
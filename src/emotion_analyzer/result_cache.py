@@ -0,0 +1,90 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def dhash(face_roi, hash_size=8):
+    """Difference hash of a crop as a hash_size**2 bit integer.
+
+    The crop is reduced to a (hash_size + 1) x hash_size grayscale thumbnail
+    and each bit records whether a pixel is brighter than its right
+    neighbour. Small changes in lighting, scale or noise flip few bits, so
+    near-identical crops are a small Hamming distance apart.
+    """
+    if face_roi.ndim == 3:
+        face_roi = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(
+        face_roi, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA
+    )
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+class ResultCache:
+    """LRU cache of analyzer results keyed by the perceptual hash of the crop.
+
+    A crop whose hash is within max_distance bits of a cached hash that is
+    younger than ttl seconds gets a copy of the cached result instead of
+    running inference, e.g. on a retake or while the same person stands in
+    front of the camera. hits and misses count lookups since start.
+    Thread-safe, so the GUI and capture workers can share one cache.
+    """
+
+    def __init__(self, max_entries=256, max_distance=4, ttl=5.0):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.ttl = ttl
+        # hash -> (time stored, result), least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, now):
+        """Returns the result stored under the nearest live hash, or None."""
+        for stored_key, (stored_at, _) in list(self.entries.items()):
+            if now - stored_at > self.ttl:
+                del self.entries[stored_key]
+        if key in self.entries:
+            nearest = key
+        else:
+            distances = {
+                stored_key: (stored_key ^ key).bit_count()
+                for stored_key in self.entries
+            }
+            nearest = min(distances, key=distances.get, default=None)
+            if nearest is None or distances[nearest] > self.max_distance:
+                return None
+        self.entries.move_to_end(nearest)
+        return self.entries[nearest][1]
+
+    def analyze(self, face_roi, analyze):
+        """Returns analyze(face_roi), or a cached result for a near-identical crop."""
+        key = dhash(face_roi)
+        with self.lock:
+            result = self.lookup(key, time.monotonic())
+            if result is not None:
+                self.hits += 1
+                # Callers write the region and camera into the result; the
+                # score arrays are never written, so they can be shared
+                return copy.copy(result)
+            self.misses += 1
+        result = analyze(face_roi)
+        with self.lock:
+            self.entries[key] = (time.monotonic(), copy.copy(result))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return result
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
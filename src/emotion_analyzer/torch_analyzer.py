@@ -0,0 +1,182 @@
+import os
+from pathlib import Path
+
+import h5py
+import numpy as np
+import torch
+from torch import nn
+
+from src.emotion_analyzer.preprocessing import prepare_face
+from src.face_result import FaceResult
+from src.weight_store import timed_load
+
+
+def _decode(name):
+    return name.decode("utf8") if isinstance(name, bytes) else name
+
+
+def read_dataset(path, dataset):
+    """Memory-maps a contiguous, unfiltered HDF5 dataset, otherwise reads it."""
+    offset = dataset.id.get_offset()
+    if offset is None or dataset.chunks is not None:
+        return np.asarray(dataset)
+    # Copy-on-write, so torch.from_numpy gets a writable array
+    return np.memmap(path, dataset.dtype, "c", offset, dataset.shape)
+
+
+def read_keras_weights(path):
+    """Reads the kernels and biases of a Keras .h5 weight file in layer order.
+
+    Only h5py is needed, so DeepFace's pretrained weights can be used without
+    importing TensorFlow. Keras stores weights contiguously, so they are
+    memory-mapped and copied once, straight into the torch parameters.
+    """
+    with h5py.File(path, "r") as f:
+        root = f["model_weights"] if "model_weights" in f else f
+        layers = []
+        for layer_name in root.attrs["layer_names"]:
+            group = root[_decode(layer_name)]
+            weight_names = [_decode(n) for n in group.attrs["weight_names"]]
+            if weight_names:
+                layers.append([read_dataset(path, group[n]) for n in weight_names])
+        return layers
+
+
+def load_keras_weights(module, path):
+    """Copies Keras conv/dense weights into the Conv2d/Linear layers of a module."""
+    targets = [m for m in module.modules() if isinstance(m, (nn.Conv2d, nn.Linear))]
+    layers = read_keras_weights(path)
+    if len(layers) != len(targets):
+        raise ValueError(
+            f"{path} has {len(layers)} weighted layers, expected {len(targets)}"
+        )
+    with torch.no_grad():
+        for target, (kernel, bias) in zip(targets, layers):
+            if isinstance(target, nn.Conv2d):
+                # Keras stores conv kernels as (kh, kw, in, out)
+                kernel = kernel.transpose(3, 2, 0, 1)
+            else:
+                kernel = kernel.T
+            target.weight.copy_(torch.from_numpy(np.ascontiguousarray(kernel)))
+            target.bias.copy_(torch.from_numpy(bias))
+    return module
+
+
+class EmotionNet(nn.Module):
+    """Torch port of DeepFace's facial expression CNN (48x48 grayscale input)."""
+
+    def __init__(self, num_classes=7):
+        super().__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(1, 64, 5),
+            nn.ReLU(),
+            nn.MaxPool2d(5, stride=2),
+            nn.Conv2d(64, 64, 3),
+            nn.ReLU(),
+            nn.Conv2d(64, 64, 3),
+            nn.ReLU(),
+            nn.AvgPool2d(3, stride=2),
+            nn.Conv2d(64, 128, 3),
+            nn.ReLU(),
+            nn.Conv2d(128, 128, 3),
+            nn.ReLU(),
+            nn.AvgPool2d(3, stride=2),
+        )
+        self.classifier = nn.Sequential(
+            nn.Flatten(),
+            nn.Linear(128, 1024),
+            nn.ReLU(),
+            nn.Linear(1024, 1024),
+            nn.ReLU(),
+            nn.Linear(1024, num_classes),
+        )
+
+    def forward(self, x):
+        return torch.softmax(self.classifier(self.features(x)), dim=1)
+
+
+class VGGFaceNet(nn.Module):
+    """Torch port of DeepFace's VGG-Face based age and gender models (224x224 BGR input)."""
+
+    BLOCKS = [(64, 2), (128, 2), (256, 3), (512, 3), (512, 3)]
+
+    def __init__(self, num_classes):
+        super().__init__()
+        layers = []
+        in_channels = 3
+        for channels, repeats in self.BLOCKS:
+            for _ in range(repeats):
+                layers += [nn.Conv2d(in_channels, channels, 3, padding=1), nn.ReLU()]
+                in_channels = channels
+            layers.append(nn.MaxPool2d(2, stride=2))
+        layers += [
+            nn.Conv2d(512, 4096, 7),
+            nn.ReLU(),
+            nn.Conv2d(4096, 4096, 1),
+            nn.ReLU(),
+            nn.Conv2d(4096, num_classes, 1),
+            nn.Flatten(),
+        ]
+        self.layers = nn.Sequential(*layers)
+
+    def forward(self, x):
+        return torch.softmax(self.layers(x), dim=1)
+
+
+class TorchAnalyzer:
+    """Emotion, age and gender analysis on the torch runtime MTCNN already uses.
+
+    Runs the same pretrained models as DeepFace, converted from their Keras
+    weight files, so TensorFlow is never imported.
+    """
+
+    WEIGHTS_URL = "https://github.com/serengil/deepface_models/releases/download/v1.0/"
+    EMOTION_WEIGHTS = "facial_expression_model_weights.h5"
+    AGE_WEIGHTS = "age_model_weights.h5"
+    GENDER_WEIGHTS = "gender_model_weights.h5"
+
+    def __init__(self, weight_store=None):
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # Without a store, missing weights are downloaded to DeepFace's cache
+        self.weight_store = weight_store
+        self.load_times = {}
+        self.emotion_model = self.load_model(EmotionNet(), self.EMOTION_WEIGHTS)
+        self.age_model = self.load_model(VGGFaceNet(101), self.AGE_WEIGHTS)
+        self.gender_model = self.load_model(VGGFaceNet(2), self.GENDER_WEIGHTS)
+        self.age_indexes = torch.arange(101, dtype=torch.float32, device=self.device)
+
+    def weights_path(self, file_name):
+        """Resolves a weight file from DeepFace's cache, downloading it if missing."""
+        if self.weight_store:
+            return self.weight_store.path(self.weight_store.name_of(file_name))
+        home = os.getenv("DEEPFACE_HOME", default=str(Path.home()))
+        path = Path(home) / ".deepface" / "weights" / file_name
+        if not path.exists():
+            import gdown
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            gdown.download(self.WEIGHTS_URL + file_name, str(path), quiet=False)
+        return path
+
+    def load_model(self, model, file_name):
+        with timed_load(file_name, self.load_times):
+            load_keras_weights(model, self.weights_path(file_name))
+            return model.to(self.device).eval()
+
+    def analyze_emotions(self, face_roi):
+        face, gray = prepare_face(face_roi)
+
+        with torch.inference_mode():
+            face_tensor = torch.from_numpy(face).permute(2, 0, 1)[None].to(self.device)
+            gray_tensor = torch.from_numpy(gray)[None, None].to(self.device)
+            emotion = self.emotion_model(gray_tensor)[0]
+            age = (self.age_model(face_tensor)[0] * self.age_indexes).sum()
+            gender = self.gender_model(face_tensor)[0]
+
+        h, w = face_roi.shape[:2]
+        return FaceResult(
+            (100 * emotion / emotion.sum()).cpu().numpy(),
+            (100 * gender).cpu().numpy(),
+            int(age.item()),
+            region=(0, 0, w, h),
+        )
@@ -0,0 +1,286 @@
+import calendar
+import datetime
+import json
+import os
+import threading
+
+import numpy as np
+
+DEFAULT_EMOTIONS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+BUCKETS = {"hour": "h", "day": "D", "month": "M", "year": "Y"}
+
+
+def seconds_of(timestamp):
+    """Returns epoch seconds for a SQLite timestamp string, datetime or date."""
+    if isinstance(timestamp, str):
+        timestamp = datetime.datetime.fromisoformat(timestamp)
+    elif not isinstance(timestamp, datetime.datetime):
+        timestamp = datetime.datetime.combine(timestamp, datetime.time.min)
+    # Timestamps are compared as naive values, like the SQL queries do
+    return calendar.timegm(timestamp.timetuple())
+
+
+def hour_of(timestamp):
+    """Returns hours since the epoch of the hour containing the timestamp."""
+    return seconds_of(timestamp) // 3600
+
+
+def weekday_hour_slots(hours):
+    """Maps epoch hours to weekday * 24 + hour of day, Monday being weekday 0."""
+    # 1970-01-01 was a Thursday
+    return (hours // 24 + 3) % 7 * 24 + hours % 24
+
+
+def covers_whole_hours(start, end):
+    """Returns whether start..end, both inclusive, is a run of whole hours.
+
+    Only then does the index count the same rows as a ts BETWEEN query: the
+    range must start on the hour and end on the last second of an hour,
+    e.g. 06:00:00 to 17:59:59.
+    """
+    return seconds_of(start) % 3600 == 0 and seconds_of(end) % 3600 == 3599
+
+
+class EmotionIndex:
+    """Per-emotion hourly counts held as one (hours, emotions) NumPy array.
+
+    Row i holds the counts of hour origin_hour + i, so an insert is a single
+    increment and every range query is a slice followed by a vectorized sum.
+    Years of history fit in a few MB (7 emotions x 4 bytes x 8760 hours is
+    240 KB per year). Snapshots are plain .npy files that load memory-mapped,
+    copy-on-write, so a cold start only reads the pages a query touches and
+    then catches up on rows inserted since the snapshot.
+    """
+
+    def __init__(self, emotions=None):
+        self.reset(emotions)
+        self.lock = threading.RLock()
+
+    def reset(self, emotions=None):
+        """Empties the index; the lock is kept so waiting threads still exclude."""
+        self.emotions = list(emotions or DEFAULT_EMOTIONS)
+        self.columns = {emotion: i for i, emotion in enumerate(self.emotions)}
+        self.origin_hour = None
+        self.length = 0
+        self.counts = np.zeros((0, len(self.emotions)), dtype=np.uint32)
+        self.last_id = 0
+
+    def column(self, emotion):
+        if emotion not in self.columns:
+            self.columns[emotion] = len(self.emotions)
+            self.emotions.append(emotion)
+            self.counts = np.hstack(
+                [self.counts, np.zeros((len(self.counts), 1), dtype=np.uint32)]
+            )
+        return self.columns[emotion]
+
+    def ensure_hours(self, first, last):
+        """Grows the array so hours first..last are addressable, doubling capacity."""
+        if self.origin_hour is None:
+            self.origin_hour = first
+        prepend = max(self.origin_hour - first, 0)
+        needed = max(last - self.origin_hour + 1, self.length) + prepend
+        if prepend or needed > len(self.counts):
+            capacity = max(needed, 2 * len(self.counts), 24)
+            counts = np.zeros((capacity, len(self.emotions)), dtype=np.uint32)
+            counts[prepend : prepend + self.length] = self.counts[: self.length]
+            self.counts = counts
+            self.origin_hour -= prepend
+            self.length += prepend
+        self.length = max(self.length, last - self.origin_hour + 1)
+
+    def add(self, emotion, timestamp=None, count=1, row_id=None):
+        """Counts one row; amortized O(1).
+
+        A row whose id does not directly follow the last indexed one (another
+        process inserted in between) is left to catch_up, which counts the gap
+        in id order.
+        """
+        timestamp = timestamp or datetime.datetime.now(datetime.timezone.utc).replace(
+            tzinfo=None
+        )
+        hour = hour_of(timestamp)
+        with self.lock:
+            if row_id is not None:
+                if row_id != self.last_id + 1:
+                    return
+                self.last_id = row_id
+            if emotion is None:
+                return
+            column = self.column(emotion)
+            self.ensure_hours(hour, hour)
+            self.counts[hour - self.origin_hour, column] += count
+
+    def add_many(self, hours, emotions, counts):
+        """Counts many (hour, emotion, count) groups with one scatter-add."""
+        if not len(hours):
+            return
+        hours = np.asarray(hours, dtype=np.int64)
+        with self.lock:
+            columns = np.array([self.column(e) for e in emotions], dtype=np.int64)
+            self.ensure_hours(int(hours.min()), int(hours.max()))
+            np.add.at(
+                self.counts,
+                (hours - self.origin_hour, columns),
+                np.asarray(counts, dtype=np.uint32),
+            )
+
+    def load_rows(self, rows):
+        hours, emotions, counts = zip(*rows) if rows else ((), (), ())
+        self.add_many(hours, emotions, counts)
+
+    def build(self, db_manager):
+        """Rebuilds from the database with one aggregated scan plus the archives."""
+        with self.lock:
+            self.reset(self.emotions)
+            self.load_rows(
+                db_manager.query_archives(
+                    """
+                    SELECT CAST(strftime('%s', hour) AS INTEGER) / 3600, emotion, SUM(count)
+                    FROM archive.emotion_counts
+                    WHERE emotion != ''
+                    GROUP BY hour, emotion
+                """,
+                    (),
+                )
+            )
+            self.catch_up(db_manager)
+
+    def catch_up(self, db_manager):
+        """Adds the rows inserted after the last indexed id."""
+        # Held across the query so add() cannot count a row the query also sees
+        with self.lock:
+            self.last_id, rows = db_manager.get_hourly_counts_since(self.last_id)
+            self.load_rows(rows)
+
+    def window(self, start, end):
+        """Returns the rows for the hours overlapping start..end and their first hour.
+
+        The index has hour resolution, so partial hours count in full; see
+        covers_whole_hours for the ranges it answers exactly.
+        """
+        if self.origin_hour is None:
+            return self.counts[:0], 0
+        first = max(hour_of(start) - self.origin_hour, 0)
+        stop = min(hour_of(end) + 1 - self.origin_hour, self.length)
+        return self.counts[first : max(stop, first)], self.origin_hour + first
+
+    def totals(self, start, end):
+        """Returns the total count per emotion in the range."""
+        with self.lock:
+            rows, _ = self.window(start, end)
+            sums = rows.sum(axis=0, dtype=np.int64)
+        return dict(zip(self.emotions, sums.tolist()))
+
+    def top_k(self, start, end, k=3):
+        """Returns the k most common (emotion, count) pairs in the range."""
+        totals = self.totals(start, end)
+        ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+        return [(emotion, count) for emotion, count in ranked[:k] if count]
+
+    def most_common(self, start, end):
+        top = self.top_k(start, end, k=1)
+        return top[0][0] if top else None
+
+    def rollup(self, start, end, bucket="day"):
+        """Sums the range into hour/day/month/year buckets.
+
+        Returns (bucket labels as datetime64, counts of shape (buckets, emotions)).
+        """
+        with self.lock:
+            rows, first_hour = self.window(start, end)
+            rows = rows.astype(np.int64)
+        if not len(rows):
+            return np.array([], dtype="datetime64[h]"), rows
+        hours = np.arange(first_hour, first_hour + len(rows)).astype("datetime64[h]")
+        labels = hours.astype(f"datetime64[{BUCKETS[bucket]}]")
+        starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+        return labels[starts], np.add.reduceat(rows, starts, axis=0)
+
+    def hourly_rows(self, start, end, emotion=None):
+        """Returns non-zero (timestamp, emotion, count) rows like get_emotion_counts."""
+        with self.lock:
+            rows, first_hour = self.window(start, end)
+            if emotion is not None:
+                if emotion not in self.columns:
+                    return []
+                rows = rows[:, [self.columns[emotion]]]
+                emotions = [emotion]
+            else:
+                emotions = list(self.emotions)
+            offsets, columns = np.nonzero(rows)
+            counts = rows[offsets, columns]
+        labels = (offsets + first_hour).astype("datetime64[h]")
+        return [
+            (str(label).replace("T", " ") + ":00:00", emotions[c], int(n))
+            for label, c, n in zip(labels, columns, counts)
+        ]
+
+    def time_of_day_totals(self, first_hour, last_hour):
+        """Returns per-emotion totals over every day for hours of day first..last."""
+        with self.lock:
+            if self.origin_hour is None:
+                return dict.fromkeys(self.emotions, 0)
+            rows = self.counts[: self.length]
+            hour_of_day = (np.arange(self.length) + self.origin_hour) % 24
+            mask = (hour_of_day >= first_hour) & (hour_of_day <= last_hour)
+            sums = rows[mask].sum(axis=0, dtype=np.int64)
+        return dict(zip(self.emotions, sums.tolist()))
+
+    def weekday_hour_totals(self, start, end):
+        """Returns a 7x24 array per emotion of counts by weekday (Monday 0) and hour."""
+        with self.lock:
+            rows, first_hour = self.window(start, end)
+            rows = rows.astype(np.int64)
+        hours = np.arange(first_hour, first_hour + len(rows))
+        grid = np.zeros((7 * 24, len(self.emotions)), np.int64)
+        np.add.at(grid, weekday_hour_slots(hours), rows)
+        grid = grid.T.reshape(len(self.emotions), 7, 24)
+        return dict(zip(self.emotions, grid))
+
+    def most_common_at_hours(self, first_hour, last_hour):
+        """Returns the most common emotion over every day for hours of day first..last."""
+        totals = self.time_of_day_totals(first_hour, last_hour)
+        emotion, count = max(totals.items(), key=lambda item: item[1])
+        return emotion if count else None
+
+    def save(self, path):
+        """Writes a snapshot: the counts as .npy and the metadata as .json.
+
+        Both files are written to temporary names and swapped in with
+        os.replace. The metadata records the size and modification time of
+        the counts file it belongs to, so load() rejects a pair left
+        mismatched by a crash between the two swaps.
+        """
+        with self.lock:
+            tmp = f"{path}.tmp.npy"
+            np.save(tmp, np.ascontiguousarray(self.counts[: self.length]))
+            stat = os.stat(tmp)
+            meta = {
+                "emotions": self.emotions,
+                "origin_hour": self.origin_hour,
+                "last_id": self.last_id,
+                "counts_stamp": [stat.st_size, stat.st_mtime_ns],
+            }
+            with open(f"{path}.json.tmp", "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp, path)
+            os.replace(f"{path}.json.tmp", f"{path}.json")
+
+    @classmethod
+    def load(cls, path):
+        """Loads a snapshot memory-mapped copy-on-write; inserts never touch the file.
+
+        Raises ValueError if the metadata does not belong to the counts file.
+        """
+        with open(f"{path}.json") as f:
+            meta = json.load(f)
+        stat = os.stat(path)
+        if meta.get("counts_stamp") != [stat.st_size, stat.st_mtime_ns]:
+            raise ValueError(f"Index metadata does not match {path}")
+        index = cls(meta["emotions"])
+        index.counts = np.load(path, mmap_mode="c")
+        index.length = len(index.counts)
+        index.origin_hour = meta["origin_hour"]
+        index.last_id = meta["last_id"]
+        return index
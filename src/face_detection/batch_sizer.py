@@ -0,0 +1,26 @@
+class BatchSizer:
+    """Picks how many frames to detect in one batch within a latency budget.
+
+    The per-frame cost of each batch is smoothed with an exponential moving
+    average, and size is the number of frames that fit in budget_s at that
+    cost, between 1 and max_size. A slower host or larger frames shrink
+    batches automatically, a faster one grows them.
+    """
+
+    def __init__(self, budget_s=0.25, max_size=8, smoothing=0.2):
+        self.budget_s = budget_s
+        self.max_size = max_size
+        self.smoothing = smoothing
+        self.frame_s = None
+        self.size = 1
+
+    def update(self, frames, elapsed_s):
+        """Records that a batch of frames took elapsed_s and returns the next size."""
+        frame_s = elapsed_s / max(frames, 1)
+        if self.frame_s is None:
+            self.frame_s = frame_s
+        else:
+            self.frame_s += self.smoothing * (frame_s - self.frame_s)
+        fits = int(self.budget_s / max(self.frame_s, 1e-6))
+        self.size = min(max(fits, 1), self.max_size)
+        return self.size
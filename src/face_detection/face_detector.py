@@ -1,12 +1,14 @@
+import cv2
+
 from src.face_detection.haarcascade_detector import HaarCascadeDetector
 from src.face_detection.mtcnn_detector import MTCNNDetector
 from src.face_detection.retinaface_detector import RetinaFaceDetector
 
 
 class FaceDetector:
-    def __init__(self, model_name="mtcnn"):
+    def __init__(self, model_name="mtcnn", weight_store=None):
         if model_name == "mtcnn":
-            self.detector = MTCNNDetector()
+            self.detector = MTCNNDetector(weight_store)
         elif model_name == "haarcascade":
             self.detector = HaarCascadeDetector()
         elif model_name == "retinaface":
@@ -14,5 +16,50 @@ class FaceDetector:
         else:
             raise ValueError(f"Unknown model name: {model_name}")
 
-    def detect_faces(self, frame):
-        return self.detector.detect_faces(frame)
+    def detect_faces(self, frame, scale=1.0):
+        """Detects faces, optionally on a downscaled copy of the frame.
+
+        Boxes are always returned in the coordinates of the full frame.
+        """
+        if scale >= 1.0:
+            return self.detector.detect_faces(frame)
+        small = cv2.resize(
+            frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+        )
+        return [
+            {key: int(value / scale) for key, value in box.items()}
+            for box in self.detector.detect_faces(small)
+        ]
+
+    def detect_faces_batch(self, frames, scale=1.0):
+        """Detects faces in several frames, returning one list of boxes per frame.
+
+        The boxes are the same as detect_faces gives for each frame. Frames
+        of equal size go through the detector in one batch when it supports
+        batching (MTCNN), others are detected one at a time.
+        """
+        if scale < 1.0:
+            frames = [
+                cv2.resize(
+                    frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+                )
+                for frame in frames
+            ]
+        detect_batch = getattr(self.detector, "detect_faces_batch", None)
+        if detect_batch is None:
+            results = [self.detector.detect_faces(frame) for frame in frames]
+        else:
+            results = [None] * len(frames)
+            groups = {}
+            for i, frame in enumerate(frames):
+                groups.setdefault(frame.shape, []).append(i)
+            for indexes in groups.values():
+                faces = detect_batch([frames[i] for i in indexes])
+                for i, boxes in zip(indexes, faces):
+                    results[i] = boxes
+        if scale >= 1.0:
+            return results
+        return [
+            [{key: int(value / scale) for key, value in box.items()} for box in boxes]
+            for boxes in results
+        ]
@@ -0,0 +1,149 @@
+import numpy as np
+
+from src.emotion_scores import EMOTION_LABELS, GENDER_LABELS, SCORE_DTYPE
+
+
+class FaceResult:
+    """Analysis of one face: scores as small float32 arrays instead of dicts.
+
+    emotion_scores and gender_scores hold percents in EMOTION_LABELS and
+    GENDER_LABELS order; the dominant labels are derived from them. region
+    is (x, y, w, h) in frame coordinates. Analyzers build these directly,
+    and from_deepface converts a result of DeepFace.analyze.
+    """
+
+    __slots__ = (
+        "emotion_scores",
+        "gender_scores",
+        "age",
+        "region",
+        "camera_id",
+        "model_name",
+    )
+
+    def __init__(
+        self,
+        emotion_scores,
+        gender_scores,
+        age,
+        region=None,
+        camera_id=None,
+        model_name=None,
+    ):
+        self.emotion_scores = emotion_scores
+        self.gender_scores = gender_scores
+        self.age = age
+        self.region = region
+        self.camera_id = camera_id
+        self.model_name = model_name
+
+    @classmethod
+    def from_deepface(cls, result):
+        """Converts one face of DeepFace.analyze's list of dicts."""
+        region = result.get("region")
+        return cls(
+            np.array(
+                [result["emotion"][label] for label in EMOTION_LABELS], np.float32
+            ),
+            np.array([result["gender"][label] for label in GENDER_LABELS], np.float32),
+            int(result["age"]),
+            region=region and (region["x"], region["y"], region["w"], region["h"]),
+        )
+
+    @property
+    def dominant_emotion(self):
+        return EMOTION_LABELS[int(self.emotion_scores.argmax())]
+
+    @property
+    def dominant_gender(self):
+        return GENDER_LABELS[int(self.gender_scores.argmax())]
+
+    def __repr__(self):
+        return (
+            f"FaceResult({self.dominant_emotion}, {self.dominant_gender}, "
+            f"age={self.age}, region={self.region}, camera_id={self.camera_id}, "
+            f"model_name={self.model_name})"
+        )
+
+
+class FaceBatch:
+    """Many faces as parallel arrays, e.g. all faces of a frame.
+
+    One (n, 4) region array and (n, labels) score arrays replace n result
+    objects, so a crowded frame costs a few arrays however many faces it
+    has. Indexing and iterating give FaceResults whose scores are views
+    into the batch.
+    """
+
+    __slots__ = (
+        "emotion_scores",
+        "gender_scores",
+        "ages",
+        "regions",
+        "camera_ids",
+        "model_names",
+    )
+
+    def __init__(
+        self, emotion_scores, gender_scores, ages, regions, camera_ids, model_names
+    ):
+        self.emotion_scores = emotion_scores
+        self.gender_scores = gender_scores
+        self.ages = ages
+        self.regions = regions
+        self.camera_ids = camera_ids
+        self.model_names = model_names
+
+    @classmethod
+    def from_results(cls, results):
+        """Stacks FaceResults into a batch; a FaceBatch is returned as is."""
+        if isinstance(results, cls):
+            return results
+        n = len(results)
+        return cls(
+            np.array([r.emotion_scores for r in results], np.float32).reshape(
+                n, len(EMOTION_LABELS)
+            ),
+            np.array([r.gender_scores for r in results], np.float32).reshape(
+                n, len(GENDER_LABELS)
+            ),
+            np.array([r.age for r in results], np.int32),
+            np.array([r.region or (0, 0, 0, 0) for r in results], np.int32).reshape(
+                n, 4
+            ),
+            [r.camera_id for r in results],
+            [r.model_name for r in results],
+        )
+
+    def __len__(self):
+        return len(self.ages)
+
+    def __getitem__(self, i):
+        return FaceResult(
+            self.emotion_scores[i],
+            self.gender_scores[i],
+            int(self.ages[i]),
+            tuple(self.regions[i].tolist()),
+            self.camera_ids[i],
+            self.model_names[i],
+        )
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def dominant_emotions(self):
+        return [EMOTION_LABELS[i] for i in self.emotion_scores.argmax(axis=1)]
+
+    def dominant_genders(self):
+        return [GENDER_LABELS[i] for i in self.gender_scores.argmax(axis=1)]
+
+    @staticmethod
+    def encode(scores):
+        """Packs percent rows into the float16 probability blobs of encode_scores."""
+        return [row.tobytes() for row in (scores / 100).astype(SCORE_DTYPE)]
+
+    def encoded_emotion_scores(self):
+        return self.encode(self.emotion_scores)
+
+    def encoded_gender_scores(self):
+        return self.encode(self.gender_scores)
@@ -1,12 +1,13 @@
 import logging
-import time
 
 import cv2
 import numpy as np
-from PIL import Image
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QImage, QPixmap
 
+from src import label_sprites
+from src.video_source import CameraSource
+
 
 class FrameProcessor:
     EMOTION_EMOJI_MAP = {
@@ -19,31 +20,34 @@ class FrameProcessor:
     }
     EMOJI_SIZE = (50, 50)
 
-    def __init__(self):
-        self.cap = self.initialize_camera()
+    def __init__(self, video_source=None):
+        self.video_source = video_source or self.initialize_camera()
 
     def initialize_camera(self):
-        """Initializes the camera."""
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            logging.error("Error: Could not open video capture device.")
-            exit()
-        time.sleep(1)  # One-time delay to allow the camera to initialize
-        return cap
+        """Initializes the default camera."""
+        try:
+            return CameraSource(0)
+        except RuntimeError as e:
+            logging.error(f"Error: {e}")
+            raise
 
     def capture_frame(self):
-        """Captures a frame from the camera."""
-        if not self.cap.isOpened():
-            logging.warning("Camera not opened, attempting to reopen...")
-            self.cap.open(0)  # Attempt to reopen the camera
-        ret, frame = self.cap.read()
-        if not ret:
+        """Captures a frame from the video source.
+
+        Returns None when the grab fails or a replay has ended; check
+        video_source.ended to tell them apart.
+        """
+        frame = self.video_source.read()
+        if frame is None and not self.video_source.ended:
             logging.error("Failed to grab frame")
-            return None
         return frame
 
-    def blur_edges(self, frame, blur_color=(255, 233, 236)):
-        """Blurs the edges of the frame, keeping the central face-shaped region clear with a specific color blur."""
+    def blur_edges(self, frame, blur_color=(255, 233, 236), scale=1.0):
+        """Blurs the edges of the frame, keeping the central face-shaped region clear with a specific color blur.
+
+        A scale below 1 blurs a downscaled copy with a proportionally smaller
+        kernel, which is much cheaper than the full-size 99x99 blur.
+        """
         h, w = frame.shape[:2]
         center_x, center_y = w // 2, h // 2
         region_w, region_h = int(w * 0.4), int(h * 0.85)
@@ -62,7 +66,18 @@ class FrameProcessor:
         )
 
         # Blur the frame
-        blurred_frame = cv2.GaussianBlur(frame, (99, 99), 0)
+        if scale < 1.0:
+            small = cv2.resize(
+                frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
+            kernel = max(3, int(99 * scale) | 1)
+            blurred_frame = cv2.resize(
+                cv2.GaussianBlur(small, (kernel, kernel), 0),
+                (w, h),
+                interpolation=cv2.INTER_LINEAR,
+            )
+        else:
+            blurred_frame = cv2.GaussianBlur(frame, (99, 99), 0)
 
         # Change the color of the blurred area
         colored_blur = np.full_like(blurred_frame, blur_color)
@@ -103,38 +118,48 @@ class FrameProcessor:
 
     def add_emoji_to_frame(self, frame, emoji_path, position):
         """Adds an emoji to the frame at the specified position."""
-        emoji_img = Image.open(emoji_path).convert("RGBA")
-        pil_frame = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).convert(
-            "RGBA"
-        )
-        emoji_img = emoji_img.resize(self.EMOJI_SIZE, None)
-        pil_frame.paste(emoji_img, position, emoji_img)
-        return cv2.cvtColor(np.array(pil_frame), cv2.COLOR_RGBA2BGR)
+        image, alpha = label_sprites.load_emoji(emoji_path, self.EMOJI_SIZE)
+        label_sprites.blend(frame, image, alpha, *position)
+        return frame
 
-    def display_image(self, image_label, frame):
-        """Displays an image on the label."""
+    def display_image(self, image_label, frame, scale=1.0):
+        """Displays an image on the label.
+
+        A scale below 1 converts a downscaled copy and stretches it with fast
+        instead of smooth scaling.
+        """
+        if scale < 1.0:
+            frame = cv2.resize(
+                frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            )
         image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        q_img = QImage(image.data, frame.shape[1], frame.shape[0], QImage.Format_RGB888)
+        q_img = QImage(image.data, image.shape[1], image.shape[0], QImage.Format_RGB888)
         pixmap = QPixmap.fromImage(q_img)
         scaled_pixmap = pixmap.scaled(
             image_label.width(),
             image_label.height(),
             Qt.KeepAspectRatio,
-            Qt.SmoothTransformation,
+            Qt.SmoothTransformation if scale >= 1.0 else Qt.FastTransformation,
         )
         image_label.setPixmap(scaled_pixmap)
 
+    def draw_face_boxes(self, frame, face_boxes):
+        """Draws the bounding boxes of detected faces on the live frame."""
+        for box in face_boxes:
+            x, y, w, h = box["x"], box["y"], box["w"], box["h"]
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (110, 188, 62), 3)
+        return frame
+
     def annotate_frame(self, frame, results):
         """Annotates the frame with bounding boxes and labels."""
         for result in results:
-            region = result[0]["region"]
-            x, y, w, h = region["x"], region["y"], region["w"], region["h"]
+            x, y, w, h = result.region
 
             # Draw the bounding box
             cv2.rectangle(frame, (x, y), (x + w, y + h), (110,188,62), 3)
-            emotion = result[0]["dominant_emotion"]
-            age = result[0]["age"]
-            gender = result[0]["dominant_gender"]
+            emotion = result.dominant_emotion
+            age = result.age
+            gender = result.dominant_gender
 
             self.draw_speech_bubble(frame, x, y, w, h, age, emotion, gender)
             
@@ -146,12 +171,13 @@ class FrameProcessor:
         return frame
 
     def draw_speech_bubble(self, frame, x, y, w, h, age, emotion, gender):
-        # Define bubble dimensions
-        bubble_width = 150
-        bubble_height = 70
-        bubble_padding = 10
-        bubble_color = (234, 20, 140)  # Light pink
-        text_color = (255, 255, 255)    # White
+        """Draws the label bubble above the face, or below it near the top edge.
+
+        The bubble and its text are pre-rendered per label and copied onto the
+        frame; only the tail, which depends on the face box, is drawn.
+        """
+        bubble_height = label_sprites.BUBBLE_HEIGHT
+        bubble_padding = label_sprites.BUBBLE_PADDING
 
         # Calculate bubble position
         bubble_x = x
@@ -159,52 +185,24 @@ class FrameProcessor:
         if bubble_y < 0:  # Ensure the bubble is within frame bounds
             bubble_y = y + h + bubble_padding
 
-        # Draw the rectangle for the bubble
-        cv2.rectangle(
-            frame,
-            (bubble_x, bubble_y),
-            (bubble_x + bubble_width, bubble_y + bubble_height),
-            bubble_color,
-            cv2.FILLED
-        )
-
         # Draw the triangular part of the speech bubble (tail)
+        tail_x = bubble_x + label_sprites.BUBBLE_WIDTH // 2
         triangle_points = [
-            (x + w // 2, y),                       # Top middle of the detected face
-            (bubble_x + bubble_width // 2 - 10, bubble_y + bubble_height),  # Bottom left of the bubble
-            (bubble_x + bubble_width // 2 + 10, bubble_y + bubble_height)   # Bottom right of the bubble
+            (x + w // 2, y),  # Top middle of the detected face
+            (tail_x - 10, bubble_y + bubble_height),  # Bottom left of the bubble
+            (tail_x + 10, bubble_y + bubble_height),  # Bottom right of the bubble
         ]
-        cv2.drawContours(frame, [np.array(triangle_points, np.int32)], 0, bubble_color, cv2.FILLED)
-
-        # Draw text inside the bubble
-        cv2.putText(
-            frame,
-            f"Age: {age}",
-            (bubble_x + bubble_padding, bubble_y + 20),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
-            text_color,
-            2
-        )
-        cv2.putText(
+        cv2.drawContours(
             frame,
-            f"Emotion: {emotion}",
-            (bubble_x + bubble_padding, bubble_y + 40),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
-            text_color,
-            2
-        )
-        cv2.putText(
-            frame,
-            f"Gender: {gender}",
-            (bubble_x + bubble_padding, bubble_y + 60),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.5,
-            text_color,
-            2
+            [np.array(triangle_points, np.int32)],
+            0,
+            label_sprites.BUBBLE_COLOR,
+            cv2.FILLED,
         )
 
+        image, mask = label_sprites.render_bubble(age, emotion, gender)
+        label_sprites.blit(frame, image, mask, bubble_x, bubble_y)
+
     def release_resources(self):
-        """Releases the camera."""
-        self.cap.release()
+        """Releases the video source."""
+        self.video_source.release()
@@ -1,14 +1,107 @@
 import datetime
 
 import matplotlib.dates as mdates
+import numpy as np
+
+from src.emotion_index import seconds_of
+
+
+class LiveView:
+    """A plotted range that new rows are merged into as they arrive.
+
+    ts_range holds the first and last epoch second the view's query counts,
+    so new rows are selected by the same exact-timestamp test. bucket maps
+    the hour of new rows to a key into each series, series names the
+    emotion of new rows for views that plot a single one.
+    """
+
+    def __init__(self, ts_range, bucket, data, new_series, redraw, watermark):
+        self.ts_range = ts_range
+        self.bucket = bucket
+        self.data = data
+        self.new_series = new_series
+        self.redraw = redraw
+        self.watermark = watermark
+
+    def merge(self, rows, series=None):
+        """Adds (epoch hour, emotion, count) rows to the series; True if any landed.
+
+        The rows must already be limited to ts_range.
+        """
+        merged = False
+        for hour, emotion, count in rows:
+            # Stored timestamps are naive UTC, like CURRENT_TIMESTAMP
+            timestamp = datetime.datetime.fromtimestamp(
+                hour * 3600, datetime.timezone.utc
+            ).replace(tzinfo=None)
+            if series:
+                if emotion != series.lower():
+                    continue
+                emotion = series
+            if emotion not in self.data:
+                self.data[emotion] = self.new_series()
+            self.data[emotion][self.bucket(timestamp)] += count
+            merged = True
+        return merged
 
 
 class Graph:
+    HEATMAP_WEEKS = 12
+    WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+
     def __init__(self, db_manager, happy_figure, emotion_figure, emotion_app):
         self.db_manager = db_manager
         self.happy_figure = happy_figure
         self.emotion_figure = emotion_figure
         self.emotion_app = emotion_app
+        # Heatmap images per figure, reused while the figure shows the heatmap
+        self.heatmap_images = {}
+        # The view each figure shows, kept up to date by poll()
+        self.live_views = {}
+        self.live_series = {happy_figure: "Happy", emotion_figure: None}
+        self.data_version = None
+
+    def consistent(self, query):
+        """Runs a trend query and returns the id watermark of the rows it saw.
+
+        The query is retried when a commit lands while it runs, so rows
+        after the watermark were not counted by it.
+        """
+        for _ in range(5):
+            version = self.db_manager.data_version()
+            watermark = self.db_manager.get_last_event_id()
+            result = query()
+            if self.db_manager.data_version() == version:
+                break
+        return watermark, result
+
+    def follow(self, figure, ts_range, bucket, data, new_series, redraw, watermark):
+        """Keeps the view just drawn on figure live, see poll()."""
+        self.live_views[figure] = LiveView(
+            ts_range, bucket, data, new_series, redraw, watermark
+        )
+
+    @staticmethod
+    def ts_range(start_time, end_time):
+        """The epoch seconds a ts BETWEEN query from start_time to end_time counts."""
+        return seconds_of(start_time), seconds_of(end_time)
+
+    def poll(self):
+        """Merges rows committed since each view was drawn and redraws it.
+
+        Costs one PRAGMA data_version read while nothing changed, and one
+        grouped query per view over the new ids otherwise.
+        """
+        version = self.db_manager.data_version()
+        if version == self.data_version:
+            return
+        self.data_version = version
+        for figure, view in self.live_views.items():
+            view.watermark, rows = self.db_manager.get_hourly_counts_since(
+                view.watermark, view.ts_range
+            )
+            if view.merge(rows, self.live_series[figure]):
+                view.redraw()
 
     def on_tab_changed(self, index):
         if index == 0:
@@ -66,7 +159,9 @@ class Graph:
         start_time = datetime.datetime.combine(today, datetime.time(6, 0))
         end_time = datetime.datetime.combine(today, datetime.time(18, 0))
 
-        emotion_counts = self.db_manager.get_emotion_counts(start_time, end_time)
+        watermark, emotion_counts = self.consistent(
+            lambda: self.db_manager.get_emotion_counts(start_time, end_time)
+        )
         hours_in_day = 13
         emotions = set([count[1] for count in emotion_counts])
         emotion_data = {emotion: [0] * hours_in_day for emotion in emotions}
@@ -79,13 +174,25 @@ class Graph:
 
         times = [start_time + datetime.timedelta(hours=i) for i in range(hours_in_day)]
 
-        self.plot_day_trend(
+        def redraw():
+            self.plot_day_trend(
+                self.emotion_figure,
+                "Emotions Over the Day",
+                "Hour of the Day",
+                "Count of Emotions",
+                emotion_data,
+                times,
+            )
+
+        redraw()
+        self.follow(
             self.emotion_figure,
-            "Emotions Over the Day",
-            "Hour of the Day",
-            "Count of Emotions",
+            self.ts_range(start_time, end_time),
+            lambda timestamp: timestamp.hour - 6,
             emotion_data,
-            times,
+            lambda: [0] * hours_in_day,
+            redraw,
+            watermark,
         )
         if update_styles:
             self.update_tab_styles(
@@ -101,8 +208,8 @@ class Graph:
             day=1
         ) - datetime.timedelta(days=1)
 
-        emotion_counts = self.db_manager.get_emotion_counts(
-            start_of_month, end_of_month
+        watermark, emotion_counts = self.consistent(
+            lambda: self.db_manager.get_emotion_counts(start_of_month, end_of_month)
         )
         days_in_month = (end_of_month - start_of_month).days + 1
         emotions = set([count[1] for count in emotion_counts])
@@ -118,13 +225,26 @@ class Graph:
         ]
 
         month_name = start_of_month.strftime("%B")
-        self.plot_month_trend(
+
+        def redraw():
+            self.plot_month_trend(
+                self.emotion_figure,
+                f"Emotions Over the Month {month_name}",
+                "Date",
+                "Count of Emotions",
+                emotion_data,
+                dates,
+            )
+
+        redraw()
+        self.follow(
             self.emotion_figure,
-            f"Emotions Over the Month {month_name}",
-            "Date",
-            "Count of Emotions",
+            self.ts_range(start_of_month, end_of_month),
+            lambda timestamp: (timestamp.date() - start_of_month).days,
             emotion_data,
-            dates,
+            lambda: [0] * days_in_month,
+            redraw,
+            watermark,
         )
         if update_styles:
             self.update_tab_styles(
@@ -138,7 +258,9 @@ class Graph:
         start_of_year = today.replace(month=1, day=1)
         end_of_year = today.replace(month=12, day=31)
 
-        emotion_counts = self.db_manager.get_emotion_counts(start_of_year, end_of_year)
+        watermark, emotion_counts = self.consistent(
+            lambda: self.db_manager.get_emotion_counts(start_of_year, end_of_year)
+        )
         months_in_year = 12
         emotions = set([count[1] for count in emotion_counts])
         emotion_data = {emotion: [0] * months_in_year for emotion in emotions}
@@ -150,13 +272,25 @@ class Graph:
 
         dates = [start_of_year.replace(month=i + 1) for i in range(months_in_year)]
 
-        self.plot_year_trend(
+        def redraw():
+            self.plot_year_trend(
+                self.emotion_figure,
+                "Emotions Over the Year",
+                "Month",
+                "Count of Emotions",
+                emotion_data,
+                dates,
+            )
+
+        redraw()
+        self.follow(
             self.emotion_figure,
-            "Emotions Over the Year",
-            "Month",
-            "Count of Emotions",
+            self.ts_range(start_of_year, end_of_year),
+            lambda timestamp: timestamp.month - 1,
             emotion_data,
-            dates,
+            lambda: [0] * months_in_year,
+            redraw,
+            watermark,
         )
         if update_styles:
             self.update_tab_styles(
@@ -165,13 +299,51 @@ class Graph:
             )
             self.current_emotion_button = self.emotion_app.emotion_year_button
 
+    def show_emotion_heatmap(self, update_styles=False):
+        today = datetime.datetime.now().date()
+        start_time = datetime.datetime.combine(
+            today - datetime.timedelta(weeks=self.HEATMAP_WEEKS, days=-1),
+            datetime.time.min,
+        )
+        end_time = datetime.datetime.combine(today, datetime.time.max)
+
+        watermark, weekday_hour_counts = self.consistent(
+            lambda: self.db_manager.get_weekday_hour_counts(start_time, end_time)
+        )
+
+        def redraw():
+            self.plot_heatmaps(
+                self.emotion_figure,
+                f"Emotions by Weekday and Hour, Last {self.HEATMAP_WEEKS} Weeks",
+                weekday_hour_counts,
+            )
+
+        redraw()
+        self.follow(
+            self.emotion_figure,
+            self.ts_range(start_time, end_time),
+            lambda timestamp: (timestamp.weekday(), timestamp.hour),
+            weekday_hour_counts,
+            lambda: np.zeros((7, 24), np.int64),
+            redraw,
+            watermark,
+        )
+        if update_styles:
+            self.update_tab_styles(
+                self.emotion_app.emotion_heatmap_button,
+                self.emotion_app.emotion_button_layout,
+            )
+            self.current_emotion_button = self.emotion_app.emotion_heatmap_button
+
     def show_happy_trend_day(self, update_styles=False):
         today = datetime.datetime.now().date()
         start_of_today = datetime.datetime.combine(today, datetime.time(6, 0))
         end_of_today = datetime.datetime.combine(today, datetime.time(18, 0))
 
-        happy_counts = self.db_manager.get_happy_emotion_counts(
-            start_of_today, end_of_today
+        watermark, happy_counts = self.consistent(
+            lambda: self.db_manager.get_happy_emotion_counts(
+                start_of_today, end_of_today
+            )
         )
         counts = [0] * 13
 
@@ -183,13 +355,25 @@ class Graph:
         happy_data = {"Happy": counts}
         times = [start_of_today + datetime.timedelta(hours=i) for i in range(13)]
 
-        self.plot_day_trend(
+        def redraw():
+            self.plot_day_trend(
+                self.happy_figure,
+                "Happy Emotions Over the Work Hours of Today",
+                "Hour of the Day",
+                "Count of Happy Emotions",
+                happy_data,
+                times,
+            )
+
+        redraw()
+        self.follow(
             self.happy_figure,
-            "Happy Emotions Over the Work Hours of Today",
-            "Hour of the Day",
-            "Count of Happy Emotions",
+            self.ts_range(start_of_today, end_of_today),
+            lambda timestamp: timestamp.hour - 6,
             happy_data,
-            times,
+            lambda: [0] * 13,
+            redraw,
+            watermark,
         )
         if update_styles:
             self.update_tab_styles(
@@ -205,8 +389,10 @@ class Graph:
             start_of_week + datetime.timedelta(days=4), datetime.time(18, 0)
         )
 
-        happy_counts = self.db_manager.get_happy_emotion_counts_for_week(
-            start_time, end_time
+        watermark, happy_counts = self.consistent(
+            lambda: self.db_manager.get_happy_emotion_counts_for_week(
+                start_time, end_time
+            )
         )
         days_in_week = 5
         happy_data = {"Happy": [0] * days_in_week}
@@ -221,13 +407,25 @@ class Graph:
             start_of_week + datetime.timedelta(days=i) for i in range(days_in_week)
         ]
 
-        self.plot_week_trend(
+        def redraw():
+            self.plot_week_trend(
+                self.happy_figure,
+                "Happy Emotions Over the Workweek",
+                "Day of the Week",
+                "Count of Happy Emotions",
+                happy_data,
+                dates,
+            )
+
+        redraw()
+        self.follow(
             self.happy_figure,
-            "Happy Emotions Over the Workweek",
-            "Day of the Week",
-            "Count of Happy Emotions",
+            self.db_manager.week_range(start_time, end_time),
+            lambda timestamp: (timestamp.date() - start_of_week).days,
             happy_data,
-            dates,
+            lambda: [0] * days_in_week,
+            redraw,
+            watermark,
         )
         if update_styles:
             self.update_tab_styles(
@@ -242,8 +440,10 @@ class Graph:
             day=1
         ) - datetime.timedelta(days=1)
 
-        happy_counts = self.db_manager.get_happy_emotion_counts(
-            start_of_month, end_of_month
+        watermark, happy_counts = self.consistent(
+            lambda: self.db_manager.get_happy_emotion_counts(
+                start_of_month, end_of_month
+            )
         )
         days_in_month = (end_of_month - start_of_month).days + 1
         happy_data = {"Happy": [0] * days_in_month}
@@ -258,13 +458,26 @@ class Graph:
         ]
 
         month_name = start_of_month.strftime("%B")
-        self.plot_month_trend(
+
+        def redraw():
+            self.plot_month_trend(
+                self.happy_figure,
+                f"Happy Emotions Over the Month {month_name}",
+                "Date",
+                "Count of Happy Emotions",
+                happy_data,
+                dates,
+            )
+
+        redraw()
+        self.follow(
             self.happy_figure,
-            f"Happy Emotions Over the Month {month_name}",
-            "Date",
-            "Count of Happy Emotions",
+            self.ts_range(start_of_month, end_of_month),
+            lambda timestamp: (timestamp.date() - start_of_month).days,
             happy_data,
-            dates,
+            lambda: [0] * days_in_month,
+            redraw,
+            watermark,
         )
         if update_styles:
             self.update_tab_styles(
@@ -278,8 +491,8 @@ class Graph:
         start_of_year = today.replace(month=1, day=1)
         end_of_year = today.replace(month=12, day=31)
 
-        happy_counts = self.db_manager.get_happy_emotion_counts(
-            start_of_year, end_of_year
+        watermark, happy_counts = self.consistent(
+            lambda: self.db_manager.get_happy_emotion_counts(start_of_year, end_of_year)
         )
         months_in_year = 12
         happy_data = {"Happy": [0] * months_in_year}
@@ -291,13 +504,25 @@ class Graph:
 
         dates = [start_of_year.replace(month=i + 1) for i in range(months_in_year)]
 
-        self.plot_year_trend(
+        def redraw():
+            self.plot_year_trend(
+                self.happy_figure,
+                "Happy Emotions Over the Year",
+                "Month",
+                "Count of Happy Emotions",
+                happy_data,
+                dates,
+            )
+
+        redraw()
+        self.follow(
             self.happy_figure,
-            "Happy Emotions Over the Year",
-            "Month",
-            "Count of Happy Emotions",
+            self.ts_range(start_of_year, end_of_year),
+            lambda timestamp: timestamp.month - 1,
             happy_data,
-            dates,
+            lambda: [0] * months_in_year,
+            redraw,
+            watermark,
         )
         if update_styles:
             self.update_tab_styles(
@@ -364,3 +589,42 @@ class Graph:
         ax.legend()
         ax.grid(True)
         figure.canvas.draw()
+
+    def plot_heatmaps(self, figure, title, data):
+        """Draws one weekday x hour heatmap per emotion.
+
+        The axes and images are created once; while the figure keeps showing
+        the heatmaps, a refresh only swaps the image data.
+        """
+        images = self.heatmap_images.get(figure)
+        if (
+            images is None
+            or list(images) != list(data)
+            or not all(image.axes in figure.axes for image in images.values())
+        ):
+            figure.clear()
+            images = {}
+            columns = 4
+            rows = -(-len(data) // columns)
+            for i, emotion in enumerate(data):
+                ax = figure.add_subplot(rows, columns, i + 1)
+                images[emotion] = ax.imshow(
+                    np.zeros((7, 24)),
+                    aspect="auto",
+                    cmap="viridis",
+                    interpolation="nearest",
+                )
+                ax.set_title(emotion.capitalize(), fontsize=9)
+                # Weekday names only on the first column, they would overlap
+                ax.set_yticks(range(7), self.WEEKDAYS if i % columns == 0 else [])
+                ax.set_xticks(range(0, 24, 6))
+                ax.tick_params(labelsize=7)
+            figure.suptitle(title)
+            figure.subplots_adjust(wspace=0.15, hspace=0.45)
+            self.heatmap_images[figure] = images
+
+        for emotion, counts in data.items():
+            # Each emotion gets its own scale, so its daily pattern is visible
+            images[emotion].set_data(counts)
+            images[emotion].set_clim(0, max(int(counts.max()), 1))
+        figure.canvas.draw()
@@ -0,0 +1,89 @@
+import functools
+
+import cv2
+import numpy as np
+
+BUBBLE_WIDTH = 150
+BUBBLE_HEIGHT = 70
+BUBBLE_PADDING = 10
+BUBBLE_COLOR = (234, 20, 140)  # Light pink
+TEXT_COLOR = (255, 255, 255)  # White
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.5
+FONT_THICKNESS = 2
+
+
+@functools.lru_cache(maxsize=256)
+def render_bubble(age, emotion, gender):
+    """Renders the speech bubble for a label once; returns (image, mask).
+
+    The mask covers the bubble and any text running past its right edge, so
+    the sprite blits exactly like drawing the bubble on the frame. Labels
+    come from a small set of (emotion, gender, age) combinations, so the
+    cache keeps every one a live overlay shows.
+    """
+    lines = [f"Age: {age}", f"Emotion: {emotion}", f"Gender: {gender}"]
+    text_width = max(
+        cv2.getTextSize(line, FONT, FONT_SCALE, FONT_THICKNESS)[0][0] for line in lines
+    )
+    # cv2.rectangle includes both corners, hence the extra pixel
+    width = max(BUBBLE_WIDTH + 1, BUBBLE_PADDING + text_width + FONT_THICKNESS)
+    height = BUBBLE_HEIGHT + 1
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    mask = np.zeros((height, width), dtype=np.uint8)
+    image[:, : BUBBLE_WIDTH + 1] = BUBBLE_COLOR
+    mask[:, : BUBBLE_WIDTH + 1] = 255
+    for i, line in enumerate(lines):
+        origin = (BUBBLE_PADDING, 20 * (i + 1))
+        cv2.putText(image, line, origin, FONT, FONT_SCALE, TEXT_COLOR, FONT_THICKNESS)
+        cv2.putText(mask, line, origin, FONT, FONT_SCALE, 255, FONT_THICKNESS)
+    # One flag per channel, so the blit is a plain masked copy without broadcasting
+    mask = np.repeat(mask[:, :, None] > 0, 3, axis=2)
+    image.flags.writeable = False
+    mask.flags.writeable = False
+    return image, mask
+
+
+@functools.lru_cache(maxsize=16)
+def load_emoji(path, size):
+    """Loads and resizes an emoji once; returns (BGR image, alpha in 0..1)."""
+    emoji = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    emoji = cv2.resize(emoji, size, interpolation=cv2.INTER_AREA)
+    if emoji.shape[2] == 3:
+        emoji = cv2.cvtColor(emoji, cv2.COLOR_BGR2BGRA)
+    image = np.ascontiguousarray(emoji[:, :, :3])
+    alpha = emoji[:, :, 3:].astype(np.float32) / 255
+    image.flags.writeable = False
+    alpha.flags.writeable = False
+    return image, alpha
+
+
+def clip(frame, image, x, y):
+    """Returns the frame and sprite slices where a sprite at (x, y) overlaps the frame."""
+    h, w = image.shape[:2]
+    frame_h, frame_w = frame.shape[:2]
+    left, top = max(x, 0), max(y, 0)
+    right, bottom = min(x + w, frame_w), min(y + h, frame_h)
+    if left >= right or top >= bottom:
+        return None
+    return (
+        (slice(top, bottom), slice(left, right)),
+        (slice(top - y, bottom - y), slice(left - x, right - x)),
+    )
+
+
+def blit(frame, image, mask, x, y):
+    """Copies the masked pixels of a sprite onto the frame at (x, y), in place."""
+    slices = clip(frame, image, x, y)
+    if slices:
+        roi, sprite = slices
+        np.copyto(frame[roi], image[sprite], where=mask[sprite])
+
+
+def blend(frame, image, alpha, x, y):
+    """Alpha-blends a sprite onto the frame at (x, y), in place."""
+    slices = clip(frame, image, x, y)
+    if slices:
+        roi, sprite = slices
+        a = alpha[sprite]
+        frame[roi] = (image[sprite] * a + frame[roi] * (1 - a) + 0.5).astype(np.uint8)
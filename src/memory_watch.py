@@ -0,0 +1,102 @@
+import gc
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+
+def current_rss_mb():
+    """Returns the resident set size of this process in MB.
+
+    Falls back to the peak RSS where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def live_figure_count(objects):
+    """Counts the matplotlib figures among objects, pyplot-managed or not."""
+    figure_module = sys.modules.get("matplotlib.figure")
+    if figure_module is None:
+        return 0
+    return sum(isinstance(obj, figure_module.Figure) for obj in objects)
+
+
+class MemoryWatch:
+    """Samples RSS, Python object counts and live figures over time.
+
+    Samples are kept in a bounded window and, when running in the
+    background, logged every interval with the change since the first
+    sample, so slow growth over a long kiosk session shows up in the log.
+    Object counting walks the gc-tracked objects, which takes a few ms.
+    """
+
+    def __init__(self, interval=60.0, window=1440, top_types=0):
+        self.interval = interval
+        self.samples = deque(maxlen=window)
+        self.first = None
+        # Number of most common object types to record per sample, 0 for none
+        self.top_types = top_types
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        """Takes, stores and returns one sample."""
+        objects = gc.get_objects()
+        sample = {
+            "time": time.time(),
+            "rss_mb": current_rss_mb(),
+            "objects": len(objects),
+            "figures": live_figure_count(objects),
+        }
+        if self.top_types:
+            types = Counter(type(obj).__name__ for obj in objects)
+            sample["types"] = dict(types.most_common(self.top_types))
+        del objects
+        self.first = self.first or sample
+        self.samples.append(sample)
+        return sample
+
+    def growth(self):
+        """Returns the change of each metric from the first to the latest sample."""
+        if not self.samples:
+            return {}
+        last = self.samples[-1]
+        return {
+            key: last[key] - self.first[key] for key in ("rss_mb", "objects", "figures")
+        }
+
+    def log_sample(self):
+        sample = self.sample()
+        growth = self.growth()
+        logging.info(
+            f"Memory: RSS {sample['rss_mb']:.1f} MB ({growth['rss_mb']:+.1f}), "
+            f"{sample['objects']} objects ({growth['objects']:+d}), "
+            f"{sample['figures']} figures ({growth['figures']:+d})"
+        )
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.log_sample()
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        """Samples periodically on a background thread."""
+        self.thread = threading.Thread(
+            target=self.run, name="memory-watch", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=10)
@@ -1,6 +1,8 @@
+import logging
+
 import cv2
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
 from PySide6.QtCore import Qt, QTimer, QRect, QPropertyAnimation
 from PySide6.QtGui import QKeyEvent, QPainter
 from PySide6.QtWidgets import (
@@ -19,22 +21,85 @@ from PySide6.QtWidgets import (
 )
 from datetime import datetime
 from src import DatabaseManager, EmotionTexts, FrameProcessor, Graph
+from src.clip_recorder import ClipRecorder
 from src.emotion_analyzer import EmotionAnalyzer
 from src.face_detection import FaceDetector
+from src.memory_watch import MemoryWatch
+from src.motion_gate import MotionGate
+from src.quality_controller import QualityController
+from src.retention import RetentionManager
+from src.sampling_profiler import SamplingProfiler
 
 
 class EmotionApp(QWidget):
     WINDOW_WIDTH_RATIO = 0.6
     WINDOW_HEIGHT_RATIO = 0.6
-
-    def __init__(self):
+    # How often the open trends dialog checks for new rows
+    TRENDS_POLL_MS = 5000
+    # How often the frames skipped by the motion gate are logged
+    MOTION_REPORT_MS = 30000
+
+    def __init__(
+        self,
+        analyzer_name="deepface",
+        target_frame_ms=33,
+        live_detection=False,
+        video_source=None,
+        retention_days=None,
+        index_path=None,
+        memory_watch_interval=None,
+        motion_sensitivity=None,
+        result_cache_ttl=None,
+        clip_seconds=None,
+        weight_store=None,
+        profile_seconds=None,
+    ):
         super().__init__()
-        self.db_manager = DatabaseManager()
-        self.face_detector = FaceDetector(model_name="mtcnn")
-        self.emotion_analyzer = EmotionAnalyzer()
-        self.frame_processor = FrameProcessor()
+        # Samples every thread on demand: the P key, SIGUSR1 or profile_seconds
+        # from startup
+        self.profiler = SamplingProfiler(
+            profile_seconds or SamplingProfiler.DEFAULT_SECONDS
+        )
+        if profile_seconds:
+            self.profiler.start()
+        self.db_manager = DatabaseManager(index_path=index_path)
+        self.retention_manager = None
+        if retention_days is not None:
+            self.retention_manager = RetentionManager(
+                self.db_manager.database_path, retention_days
+            )
+            self.retention_manager.start()
+        self.memory_watch = None
+        if memory_watch_interval:
+            self.memory_watch = MemoryWatch(memory_watch_interval)
+            self.memory_watch.start()
+        # Keeps the last clip_seconds of the preview for a clip of each capture
+        self.clip_recorder = None
+        if clip_seconds:
+            self.clip_recorder = ClipRecorder(clip_seconds)
+            self.clip_recorder.start()
+        # Both capture detectors are loaded once, not on every capture
+        self.face_detector = FaceDetector(model_name="mtcnn", weight_store=weight_store)
+        self.cascade_detector = FaceDetector(model_name="haarcascade")
+        self.emotion_analyzer = EmotionAnalyzer(
+            analyzer_name=analyzer_name,
+            cache_ttl=result_cache_ttl,
+            weight_store=weight_store,
+        )
+        self.frame_processor = FrameProcessor(video_source)
         self.emotion_texts = EmotionTexts()
+        self.quality_controller = QualityController(target_frame_ms=target_frame_ms)
         self.single_person_mode = True
+        # Live detection draws face boxes on the preview every detection_stride frames
+        self.live_detection = live_detection
+        self.live_face_detector = (
+            FaceDetector(model_name="haarcascade") if live_detection else None
+        )
+        self.live_face_boxes = []
+        # Skips live detection while the scene is static
+        self.motion_gate = (
+            MotionGate(motion_sensitivity) if motion_sensitivity is not None else None
+        )
 
         self.firstPageWidget = QWidget()
         self.mainPageWidget = QWidget()
@@ -56,6 +121,7 @@ class EmotionApp(QWidget):
         self.live_video = True
         self.current_frame = None
         self.current_results = None
+        self.trends_window = None
         self.current_happy_button = None
         self.current_emotion_button = None
         self.stackedWidget.setCurrentWidget(self.firstPageWidget)
@@ -168,7 +234,11 @@ class EmotionApp(QWidget):
         self.timer = QTimer(self)
         self.timer.setTimerType(Qt.PreciseTimer)
         self.timer.timeout.connect(self.update_frame)
-        self.timer.start(20)
+        self.timer.start(self.quality_controller.target_frame_ms)
+        if self.motion_gate:
+            self.motion_report_timer = QTimer(self)
+            self.motion_report_timer.timeout.connect(self.log_motion_gate)
+            self.motion_report_timer.start(self.MOTION_REPORT_MS)
 
     def setup_buttons(self, main_layout):
         # Capture Button
@@ -342,11 +412,51 @@ class EmotionApp(QWidget):
 
     def update_frame(self):
         if self.live_video:
-            frame = self.frame_processor.capture_frame()
+            controller = self.quality_controller
+            point = controller.operating_point
+            with controller.time_stage("capture"):
+                frame = self.frame_processor.capture_frame()
+            if frame is None and self.frame_processor.video_source.ended:
+                # A replay without --loop keeps its last frame on screen
+                logging.info("Video source ended, stopping the live preview")
+                self.timer.stop()
+                return
             if frame is not None:
+                if self.live_detection:
+                    with controller.time_stage("detection"):
+                        # The gate sees every frame, so its background stays
+                        # current between detections
+                        moved = self.has_motion(frame)
+                        if controller.should_detect() and moved:
+                            self.live_face_boxes = self.live_face_detector.detect_faces(
+                                frame, scale=point["detection_scale"]
+                            )
+                        self.frame_processor.draw_face_boxes(
+                            frame, self.live_face_boxes
+                        )
                 if self.single_person_mode:
-                    frame = self.frame_processor.blur_edges(frame)
-                self.display_image(frame)
+                    with controller.time_stage("blur"):
+                        frame = self.frame_processor.blur_edges(
+                            frame, scale=point["blur_scale"]
+                        )
+                if self.clip_recorder:
+                    self.clip_recorder.push(frame)
+                with controller.time_stage("display"):
+                    self.frame_processor.display_image(
+                        self.image_label, frame, scale=point["display_scale"]
+                    )
+            controller.end_frame()
+
+    def has_motion(self, frame):
+        return self.motion_gate is None or self.motion_gate.has_motion(frame)
+
+    def log_motion_gate(self):
+        gate = self.motion_gate
+        if gate:
+            logging.info(
+                f"Live preview: checked {gate.frames_checked} frames for motion, "
+                f"{gate.frames_skipped} skipped without motion"
+            )
 
     def display_image(self, frame):
         self.frame_processor.display_image(self.image_label, frame)
@@ -354,6 +464,14 @@ class EmotionApp(QWidget):
     def closeEvent(self, event):
         print("Cleaning up resources...")
         self.frame_processor.release_resources()
+        if self.retention_manager:
+            self.retention_manager.stop()
+        if self.memory_watch:
+            self.memory_watch.stop()
+        if self.clip_recorder:
+            self.clip_recorder.stop()
+        self.profiler.stop()
+        self.log_motion_gate()
         self.db_manager.close()
         event.accept()
 
@@ -376,6 +494,9 @@ class EmotionApp(QWidget):
             self.close_button.show()
             self.live_video = True
             print("Resuming live feed...")
+        elif event.key() == Qt.Key_P:
+            if self.profiler.start():
+                print(f"Profiling for {self.profiler.seconds:g} s...")
         elif event.key() == Qt.Key_Q:
             print("Exiting... Bye!")
             self.close()
@@ -399,13 +520,11 @@ class EmotionApp(QWidget):
                 blurred_frame = frame
 
             # MTCNN face detection
-            self.face_detector = FaceDetector(model_name="mtcnn")
             mtcnn_face_boxes = self.face_detector.detect_faces(frame)
             mtcnn_results = self.process_face_boxes(frame, mtcnn_face_boxes, "MTCNN")
 
             # HaarCascade face detection
-            self.face_detector = FaceDetector(model_name="haarcascade")
-            cascade_face_boxes = self.face_detector.detect_faces(frame)
+            cascade_face_boxes = self.cascade_detector.detect_faces(frame)
             cascade_results = self.process_face_boxes(
                 frame, cascade_face_boxes, "HaarCascade"
             )
@@ -427,6 +546,10 @@ class EmotionApp(QWidget):
             else:
                 self.display_image(blurred_frame)
                 self.current_frame = blurred_frame
+            if self.clip_recorder:
+                # Ends the clip on the annotated capture
+                self.clip_recorder.push(self.current_frame, force=True)
+                self.clip_recorder.save_clip()
 
             self.update_button_states(
                 accept_button=True, discard_button=True, capture_button=False
@@ -439,12 +562,10 @@ class EmotionApp(QWidget):
         for box in face_boxes:
             x, y, w, h = box["x"], box["y"], box["w"], box["h"]
             face_roi = frame[y : y + h, x : x + w]
-            emotion_result = self.emotion_analyzer.analyze_emotions(face_roi)
-            emotion_result[0]["region"] = box
-            emotion_result[0][
-                "model_name"
-            ] = model_name  # Adding model name for comparison
-            results.append(emotion_result)
+            result = self.emotion_analyzer.analyze_emotions(face_roi)
+            result.region = (x, y, w, h)
+            result.model_name = model_name  # Adding model name for comparison
+            results.append(result)
         return results
 
     def compare_results(self, mtcnn_results, cascade_results):
@@ -493,22 +614,38 @@ class EmotionApp(QWidget):
         print("Image was discarded!")
 
     def add_to_database(self, results):
-        for result in results:
-            emotion = result[0]["dominant_emotion"]
-            age = result[0]["age"]
-            gender = result[0]["dominant_gender"]
-            self.db_manager.add_emotion(emotion, age, gender)
+        self.db_manager.add_results(results)
         print("Data added to database")
 
     def show_trends_dialog(self):
+        # The dialog with its figures and canvases is built once and reused,
+        # so reopening it does not pile up figures over a long session
+        if self.trends_window is None:
+            self.build_trends_dialog()
+        self.tabs.setCurrentIndex(0)
+        self.graph.live_views.clear()
+
+        # Show the default graph (e.g., Happy Emotions Over the Day)
+        self.graph.show_happy_trend_day(True)
+        self.graph.happy_tab_viewed = True
+        self.graph.emotion_tab_viewed = False
+        self.graph.current_happy_button = self.happy_day_button
+
+        # Merges new rows into the open graphs until the dialog closes
+        self.trends_timer.start(self.TRENDS_POLL_MS)
+        self.trends_window.exec()
+        self.trends_timer.stop()
+
+    def build_trends_dialog(self):
         self.trends_window = QDialog(self)
         self.trends_window.setWindowTitle("Emotion Trends")
         dialog_layout = QVBoxLayout(self.trends_window)
 
         self.tabs = QTabWidget(self.trends_window)
-        self.happy_figure = plt.figure()
+        # Figures are created outside pyplot, which would keep every one alive
+        self.happy_figure = Figure()
         self.happy_canvas = FigureCanvas(self.happy_figure)
-        self.emotion_figure = plt.figure()
+        self.emotion_figure = Figure()
         self.emotion_canvas = FigureCanvas(self.emotion_figure)
 
         # Initialize the Graph class
@@ -561,6 +698,7 @@ class EmotionApp(QWidget):
         self.emotion_week_button = QPushButton("Week")
         self.emotion_month_button = QPushButton("Month")
         self.emotion_year_button = QPushButton("Year")
+        self.emotion_heatmap_button = QPushButton("Heatmap")
 
         self.emotion_day_button.clicked.connect(
             lambda: self.graph.show_emotion_trend_day(True)
@@ -574,11 +712,15 @@ class EmotionApp(QWidget):
         self.emotion_year_button.clicked.connect(
             lambda: self.graph.show_emotion_trend_year(True)
         )
+        self.emotion_heatmap_button.clicked.connect(
+            lambda: self.graph.show_emotion_heatmap(True)
+        )
 
         self.emotion_button_layout.addWidget(self.emotion_day_button)
         self.emotion_button_layout.addWidget(self.emotion_week_button)
         self.emotion_button_layout.addWidget(self.emotion_month_button)
         self.emotion_button_layout.addWidget(self.emotion_year_button)
+        self.emotion_button_layout.addWidget(self.emotion_heatmap_button)
 
         emotion_layout.addLayout(self.emotion_button_layout)
         emotion_layout.addWidget(self.emotion_canvas)
@@ -591,15 +733,11 @@ class EmotionApp(QWidget):
 
         self.trends_window.setLayout(dialog_layout)
 
-        # Show the default graph (e.g., Happy Emotions Over the Day)
-        self.graph.show_happy_trend_day(True)
-        self.graph.happy_tab_viewed = True
-        self.graph.current_happy_button = self.happy_day_button
-
         # Connect tab change to method
         self.tabs.currentChanged.connect(self.graph.on_tab_changed)
 
-        self.trends_window.exec()
+        self.trends_timer = QTimer(self.trends_window)
+        self.trends_timer.timeout.connect(self.graph.poll)
 
     def update_button_states(self, *, accept_button, discard_button, capture_button):
         self.accept_button.setEnabled(accept_button)
@@ -0,0 +1,58 @@
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decides whether a frame changed enough to be worth detecting faces in.
+
+    Each frame is reduced to a small blurred grayscale copy and compared to a
+    running-average background. The frame passes when the fraction of pixels
+    that differ from the background by more than pixel_threshold reaches
+    sensitivity. The background slowly absorbs whatever stays still, so an
+    empty scene or a person standing still stops passing after a few seconds
+    and detection and inference are skipped. The check costs well under a
+    millisecond per frame.
+    """
+
+    def __init__(
+        self,
+        sensitivity=0.01,
+        pixel_threshold=25,
+        width=160,
+        learning_rate=0.05,
+    ):
+        # Fraction of changed pixels that counts as motion; lower is more sensitive
+        self.sensitivity = sensitivity
+        self.pixel_threshold = pixel_threshold
+        self.width = width
+        self.learning_rate = learning_rate
+        self.background = None
+        self.frames_checked = 0
+        self.frames_skipped = 0
+
+    def preprocess(self, frame):
+        h, w = frame.shape[:2]
+        size = (self.width, max(1, round(h * self.width / w)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def has_motion(self, frame):
+        """Updates the background with the frame and returns whether it moved."""
+        small = self.preprocess(frame)
+        self.frames_checked += 1
+        if self.background is None or self.background.shape != small.shape:
+            self.background = small.astype(np.float32)
+            return True
+        diff = cv2.absdiff(small, cv2.convertScaleAbs(self.background))
+        changed = np.count_nonzero(diff > self.pixel_threshold) / diff.size
+        cv2.accumulateWeighted(small, self.background, self.learning_rate)
+        if changed < self.sensitivity:
+            self.frames_skipped += 1
+            return False
+        return True
+
+    def reset(self):
+        """Forgets the background, so the next frame passes."""
+        self.background = None
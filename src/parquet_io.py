@@ -0,0 +1,238 @@
+import argparse
+import json
+import logging
+import sqlite3
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from src.database_manager import DatabaseManager
+
+SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("emotion", pa.dictionary(pa.int8(), pa.string())),
+        ("age", pa.int16()),
+        ("gender", pa.dictionary(pa.int8(), pa.string())),
+        ("timestamp", pa.timestamp("s")),
+        ("camera_id", pa.dictionary(pa.int16(), pa.string())),
+        # float16 probability blobs as stored, see src.emotion_scores
+        ("emotion_scores", pa.binary()),
+        ("gender_scores", pa.binary()),
+    ]
+)
+# Columns written back by the importer; files exported before the score
+# blobs were added lack the last two
+IMPORT_COLUMNS = [
+    "emotion",
+    "age",
+    "gender",
+    "timestamp",
+    "camera_id",
+    "emotion_scores",
+    "gender_scores",
+]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _parse_age(age):
+    if age is None or age == "":
+        return None
+    return int(float(age))
+
+
+def _dictionary_array(values, dictionary_type):
+    return pa.array(values, pa.string()).dictionary_encode().cast(dictionary_type)
+
+
+class ParquetExporter:
+    """Streams the emotions table into Parquet files partitioned by month.
+
+    Rows are read in id order with keyset pagination, one chunk at a time, so
+    memory stays bounded however large the table is. The highest exported id
+    is kept as a watermark next to the files, so the next run only exports
+    newer rows.
+    """
+
+    CHUNK_SIZE = 50_000
+    WATERMARK_FILE = "_watermark.json"
+
+    def __init__(self, output_dir, database_path=DatabaseManager.DATABASE_PATH):
+        self.output_dir = Path(output_dir)
+        self.database_path = database_path
+
+    def read_watermark(self):
+        path = self.output_dir / self.WATERMARK_FILE
+        if not path.exists():
+            return 0
+        return json.loads(path.read_text())["last_id"]
+
+    def write_watermark(self, last_id):
+        path = self.output_dir / self.WATERMARK_FILE
+        path.write_text(json.dumps({"last_id": last_id}))
+
+    def iter_chunks(self, conn, since_id):
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(emotions)")}
+        # Databases from before multi-camera support or the score vectors lack
+        # those columns
+        columns = [
+            name if name in existing else f"NULL AS {name}" for name in SCHEMA.names
+        ]
+        last_id = since_id
+        while True:
+            rows = conn.execute(
+                f"SELECT {', '.join(columns)} FROM emotions WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, self.CHUNK_SIZE),
+            ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield rows
+
+    def to_table(self, rows):
+        (
+            ids,
+            emotions,
+            ages,
+            genders,
+            timestamps,
+            camera_ids,
+            emotion_scores,
+            gender_scores,
+        ) = zip(*rows)
+        return pa.Table.from_arrays(
+            [
+                pa.array(ids, pa.int64()),
+                _dictionary_array(emotions, SCHEMA.field("emotion").type),
+                pa.array([_parse_age(age) for age in ages], pa.int16()),
+                _dictionary_array(genders, SCHEMA.field("gender").type),
+                pc.strptime(
+                    pa.array(timestamps, pa.string()), TIMESTAMP_FORMAT, unit="s"
+                ),
+                _dictionary_array(camera_ids, SCHEMA.field("camera_id").type),
+                pa.array(emotion_scores, pa.binary()),
+                pa.array(gender_scores, pa.binary()),
+            ],
+            schema=SCHEMA,
+        )
+
+    def export(self, since_id=None):
+        """Exports rows newer than since_id (default: the watermark).
+
+        Returns the number of exported rows.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        since_id = self.read_watermark() if since_id is None else since_id
+        uri = f"{Path(self.database_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True)
+        writers = {}
+        exported = 0
+        last_id = since_id
+        try:
+            for rows in self.iter_chunks(conn, since_id):
+                table = self.to_table(rows)
+                months = pc.strftime(table["timestamp"], "%Y-%m")
+                for month in pc.unique(months).to_pylist():
+                    part = table.filter(pc.equal(months, month))
+                    self.writer_for(writers, month, part["id"][0].as_py()).write_table(
+                        part
+                    )
+                # Rows arrive roughly in time order, so older months are done
+                current = months[-1].as_py()
+                for month in [m for m in writers if m < current]:
+                    writers.pop(month).close()
+                exported += len(rows)
+                last_id = rows[-1][0]
+        finally:
+            for writer in writers.values():
+                writer.close()
+            conn.close()
+        if exported:
+            self.write_watermark(last_id)
+        logging.info(f"Exported {exported} rows to {self.output_dir}")
+        return exported
+
+    def writer_for(self, writers, month, first_id):
+        if month not in writers:
+            partition = self.output_dir / f"month={month}"
+            partition.mkdir(exist_ok=True)
+            writers[month] = pq.ParquetWriter(
+                partition / f"part-{first_id:012d}.parquet",
+                SCHEMA,
+                use_dictionary=["emotion", "gender", "camera_id"],
+                compression="zstd",
+            )
+        return writers[month]
+
+
+class ParquetImporter:
+    """Bulk-loads exported Parquet files back into the emotions table.
+
+    Files are read batch by batch and each batch is inserted in a single
+    transaction. Row ids are not imported, SQLite assigns new ones. The
+    score blobs are imported as they were exported.
+    """
+
+    BATCH_SIZE = 50_000
+
+    def __init__(self, db_manager):
+        self.db_manager = db_manager
+
+    def import_path(self, path):
+        """Imports a Parquet file or a directory of them; returns the row count."""
+        path = Path(path)
+        files = sorted(path.rglob("*.parquet")) if path.is_dir() else [path]
+        imported = 0
+        for file in files:
+            parquet_file = pq.ParquetFile(file)
+            columns = [
+                name for name in IMPORT_COLUMNS if name in parquet_file.schema.names
+            ]
+            for batch in parquet_file.iter_batches(
+                batch_size=self.BATCH_SIZE, columns=columns
+            ):
+                # Parquet stores the timestamps in milliseconds, cast back to
+                # seconds so they format like SQLite's CURRENT_TIMESTAMP
+                timestamps = pc.strftime(
+                    batch["timestamp"].cast(pa.timestamp("s")), TIMESTAMP_FORMAT
+                )
+                missing = [None] * batch.num_rows
+                rows = zip(
+                    batch["emotion"].cast(pa.string()).to_pylist(),
+                    batch["age"].to_pylist(),
+                    batch["gender"].cast(pa.string()).to_pylist(),
+                    timestamps.to_pylist(),
+                    batch["camera_id"].cast(pa.string()).to_pylist(),
+                    *(
+                        batch[name].to_pylist() if name in columns else missing
+                        for name in ["emotion_scores", "gender_scores"]
+                    ),
+                )
+                self.db_manager.add_emotions(rows)
+                imported += batch.num_rows
+        logging.info(f"Imported {imported} rows from {path}")
+        return imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export the emotions table to Parquet or import it back."
+    )
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="export directory, or file/directory to import")
+    parser.add_argument("--database", default=DatabaseManager.DATABASE_PATH)
+    parser.add_argument(
+        "--since-id",
+        type=int,
+        help="export rows after this id instead of the watermark",
+    )
+    args = parser.parse_args()
+
+    if args.command == "export":
+        ParquetExporter(args.path, args.database).export(args.since_id)
+    else:
+        db_manager = DatabaseManager(args.database)
+        ParquetImporter(db_manager).import_path(args.path)
+        db_manager.close()
@@ -0,0 +1,121 @@
+import logging
+import time
+from contextlib import contextmanager
+
+
+class QualityController:
+    """Adjusts live-loop quality to hold a target frame time.
+
+    Per-stage latencies are measured every frame. After each window of frames
+    the mean processing time is compared against the target: the controller
+    steps down one operating point when it is over budget and back up when
+    there is enough headroom, so weak hosts stay smooth and strong hosts get
+    full quality.
+    """
+
+    # Operating points from best quality to cheapest
+    OPERATING_POINTS = [
+        {
+            "detection_stride": 1,
+            "detection_scale": 1.0,
+            "blur_scale": 1.0,
+            "display_scale": 1.0,
+        },
+        {
+            "detection_stride": 2,
+            "detection_scale": 1.0,
+            "blur_scale": 0.5,
+            "display_scale": 1.0,
+        },
+        {
+            "detection_stride": 3,
+            "detection_scale": 0.75,
+            "blur_scale": 0.5,
+            "display_scale": 0.75,
+        },
+        {
+            "detection_stride": 4,
+            "detection_scale": 0.5,
+            "blur_scale": 0.25,
+            "display_scale": 0.75,
+        },
+        {
+            "detection_stride": 6,
+            "detection_scale": 0.5,
+            "blur_scale": 0.25,
+            "display_scale": 0.5,
+        },
+    ]
+    # The camera read blocks until the device delivers the next frame, so it
+    # is paced by the camera rather than by the host and is not controlled.
+    UNCONTROLLED_STAGES = {"capture"}
+    HEADROOM = 0.6
+
+    def __init__(self, target_frame_ms=33, window=30):
+        self.target_frame_ms = target_frame_ms
+        self.window = window
+        self.level = 0
+        self.frame_count = 0
+        self.stage_ms = {}
+        self.current_frame = {}
+        self.window_frames = []
+
+    @property
+    def operating_point(self):
+        return self.OPERATING_POINTS[self.level]
+
+    @contextmanager
+    def time_stage(self, name):
+        """Times one pipeline stage of the current frame."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.current_frame[name] = self.current_frame.get(name, 0.0) + elapsed
+
+    def should_detect(self):
+        """Returns whether detection runs on the current frame under the stride."""
+        return self.frame_count % self.operating_point["detection_stride"] == 0
+
+    def end_frame(self):
+        """Records the current frame and re-evaluates the operating point."""
+        for name, elapsed in self.current_frame.items():
+            previous = self.stage_ms.get(name, elapsed)
+            self.stage_ms[name] = 0.9 * previous + 0.1 * elapsed
+        self.window_frames.append(
+            sum(
+                elapsed
+                for name, elapsed in self.current_frame.items()
+                if name not in self.UNCONTROLLED_STAGES
+            )
+        )
+        self.current_frame = {}
+        self.frame_count += 1
+
+        if len(self.window_frames) < self.window:
+            return
+        mean_frame_ms = sum(self.window_frames) / len(self.window_frames)
+        self.window_frames = []
+        if mean_frame_ms > self.target_frame_ms:
+            self.set_level(self.level + 1, mean_frame_ms)
+        elif mean_frame_ms < self.target_frame_ms * self.HEADROOM:
+            self.set_level(self.level - 1, mean_frame_ms)
+
+    def set_level(self, level, mean_frame_ms):
+        level = min(max(level, 0), len(self.OPERATING_POINTS) - 1)
+        if level == self.level:
+            return
+        self.level = level
+        logging.info(
+            f"Quality operating point {self.level} after {mean_frame_ms:.1f} ms "
+            f"frames (target {self.target_frame_ms} ms): {self.metrics()}"
+        )
+
+    def metrics(self):
+        """Returns the current operating point and smoothed stage latencies."""
+        return {
+            "level": self.level,
+            **self.operating_point,
+            "stage_ms": {name: round(ms, 2) for name, ms in self.stage_ms.items()},
+        }
@@ -0,0 +1,170 @@
+import argparse
+import datetime
+import logging
+import sqlite3
+import threading
+
+from src.database_manager import DatabaseManager
+from src.emotion_index import seconds_of
+
+
+class RetentionManager:
+    """Keeps the hot emotions table small.
+
+    Raw rows older than the retention window are folded into hourly counts
+    per emotion, gender and camera in a per-month archive database, then
+    deleted from the hot database. The freed pages are returned to the file
+    system with incremental vacuum. DatabaseManager attaches the archives on
+    demand for queries that reach back past the window.
+
+    The manager uses its own connections, so it can run on a background
+    thread next to the GUI. Each transaction folds a single day, so the
+    kiosk's writer never waits on it for long; DatabaseManager switches the
+    database to incremental auto-vacuum when it sets up the schema.
+    """
+
+    VACUUM_PAGES = 1000
+
+    def __init__(
+        self,
+        database_path=DatabaseManager.DATABASE_PATH,
+        retention_days=90,
+        interval=3600,
+    ):
+        self.database_path = database_path
+        self.retention_days = retention_days
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def connect(self):
+        return sqlite3.connect(self.database_path, timeout=DatabaseManager.BUSY_TIMEOUT)
+
+    def cutoff(self):
+        """Start of the retention window in epoch seconds, at a UTC day boundary."""
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        return seconds_of(today - datetime.timedelta(days=self.retention_days))
+
+    def fold_month(self, conn, month, cutoff):
+        """Moves one month of expired rows into its archive as hourly counts.
+
+        Every deleted row is counted in the archive. Missing labels are stored
+        as '', and queries skip the '' emotion as they skip NULL emotions.
+        Each UTC day is folded and deleted in its own transaction, which
+        bounds how long the write lock is held.
+        """
+        month_start = seconds_of(f"{month}-01")
+        next_month = datetime.date.fromisoformat(f"{month}-01") + datetime.timedelta(
+            days=32
+        )
+        end = min(seconds_of(next_month.replace(day=1)), cutoff)
+        path = DatabaseManager.archive_path(self.database_path, month)
+        path.parent.mkdir(exist_ok=True)
+        conn.execute("ATTACH DATABASE ? AS archive", (str(path),))
+        try:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS archive.emotion_counts (
+                    hour TEXT,
+                    emotion TEXT,
+                    gender TEXT,
+                    camera_id TEXT,
+                    count INTEGER,
+                    PRIMARY KEY (hour, emotion, gender, camera_id)
+                ) WITHOUT ROWID
+            """
+            )
+            folded = deleted = 0
+            for day in range(month_start, end, 86400):
+                folded_day, deleted_day = self.fold_range(
+                    conn, day, min(day + 86400, end)
+                )
+                folded += folded_day
+                deleted += deleted_day
+        finally:
+            conn.execute("DETACH DATABASE archive")
+        logging.info(f"Folded {deleted} rows of {month} into {folded} hourly counts")
+        return deleted
+
+    def fold_range(self, conn, start, end):
+        """Folds and deletes the rows with start <= ts < end in one transaction."""
+        with conn:
+            # Takes the write lock up front: a deferred transaction that first
+            # reads could not upgrade once the kiosk's writer has committed
+            conn.execute("BEGIN IMMEDIATE")
+            folded = conn.execute(
+                """
+                INSERT INTO archive.emotion_counts (hour, emotion, gender, camera_id, count)
+                SELECT datetime(e.ts / 3600 * 3600, 'unixepoch'),
+                    IFNULL(el.label, ''), IFNULL(gl.label, ''), IFNULL(cl.label, ''),
+                    COUNT(*)
+                FROM emotion_events e
+                LEFT JOIN emotion_labels el ON el.code = e.emotion
+                LEFT JOIN gender_labels gl ON gl.code = e.gender
+                LEFT JOIN camera_labels cl ON cl.code = e.camera
+                WHERE e.ts >= ? AND e.ts < ?
+                GROUP BY e.ts / 3600, e.emotion, e.gender, e.camera
+                ON CONFLICT (hour, emotion, gender, camera_id)
+                DO UPDATE SET count = count + excluded.count
+            """,
+                (start, end),
+            ).rowcount
+            deleted = conn.execute(
+                "DELETE FROM emotion_events WHERE ts >= ? AND ts < ?",
+                (start, end),
+            ).rowcount
+        return folded, deleted
+
+    def run_once(self):
+        """Folds every expired month and reclaims the freed pages."""
+        conn = self.connect()
+        try:
+            cutoff = self.cutoff()
+            months = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT strftime('%Y-%m', ts, 'unixepoch') FROM emotion_events WHERE ts < ?",
+                    (cutoff,),
+                )
+            ]
+            deleted = sum(self.fold_month(conn, month, cutoff) for month in months)
+            # Reclaim a bounded number of pages per call so writers are not
+            # blocked for long; the next run continues where this one stopped.
+            (free_pages,) = conn.execute("PRAGMA freelist_count").fetchone()
+            if free_pages:
+                # executescript steps the pragma to completion, execute() would
+                # free a single page
+                conn.executescript(f"PRAGMA incremental_vacuum({self.VACUUM_PAGES});")
+            return deleted
+        finally:
+            conn.close()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.run_once()
+            except sqlite3.Error as e:
+                logging.error(f"Retention run failed: {e}")
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        """Runs retention periodically on a background thread."""
+        self.thread = threading.Thread(target=self.run, name="retention", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fold expired emotion rows into monthly archives."
+    )
+    parser.add_argument("--database", default=DatabaseManager.DATABASE_PATH)
+    parser.add_argument("--days", type=int, default=90, help="raw retention window")
+    args = parser.parse_args()
+    # Creates or migrates the schema first
+    DatabaseManager(args.database).close()
+    RetentionManager(args.database, args.days).run_once()
@@ -0,0 +1,131 @@
+import logging
+import os
+import sys
+import threading
+
+import cv2
+
+
+def parse_cpu_list(spec):
+    """Parses a CPU list such as "0,2-3" into a set of CPU ids."""
+    if not spec:
+        return None
+    cpus = set()
+    for part in spec.split(","):
+        start, _, end = part.partition("-")
+        cpus.update(range(int(start), int(end or start) + 1))
+    return cpus
+
+
+class RuntimeConfig:
+    """Thread budgets for OpenCV, PyTorch and TensorFlow plus optional CPU affinity.
+
+    Every framework sizes its own thread pool to all cores by default, so with
+    three of them loaded the CPU is oversubscribed. Detection (torch) and
+    analysis (TensorFlow or torch) run one after the other on the same thread,
+    so both get the inference budget while OpenCV keeps a smaller share.
+    """
+
+    BUDGET_KEYS = ["opencv", "torch", "torch_interop", "tf_intra", "tf_inter"]
+
+    def __init__(
+        self,
+        opencv=1,
+        torch=1,
+        torch_interop=1,
+        tf_intra=1,
+        tf_inter=1,
+        capture_cpus=None,
+        inference_cpus=None,
+    ):
+        self.opencv = opencv
+        self.torch = torch
+        self.torch_interop = torch_interop
+        self.tf_intra = tf_intra
+        self.tf_inter = tf_inter
+        self.capture_cpus = capture_cpus
+        self.inference_cpus = inference_cpus
+
+    @classmethod
+    def for_host(cls, cpu_count=None):
+        """Returns the default budget split for a host with cpu_count cores."""
+        cpu_count = cpu_count or os.cpu_count() or 1
+        opencv = max(1, cpu_count // 4)
+        inference = max(1, cpu_count - opencv)
+        return cls(
+            opencv=opencv,
+            torch=inference,
+            torch_interop=1,
+            tf_intra=inference,
+            tf_inter=1,
+        )
+
+    @classmethod
+    def from_spec(cls, spec, capture_cpus=None, inference_cpus=None):
+        """Builds a config from "opencv=2,torch=4,..." on top of the host defaults."""
+        config = cls.for_host()
+        for item in filter(None, (spec or "").split(",")):
+            key, _, value = item.partition("=")
+            key = key.strip()
+            if key not in cls.BUDGET_KEYS:
+                raise ValueError(f"Unknown thread budget: {key}")
+            setattr(config, key, int(value))
+        config.capture_cpus = parse_cpu_list(capture_cpus)
+        config.inference_cpus = parse_cpu_list(inference_cpus)
+        return config
+
+    def budgets(self):
+        return {key: getattr(self, key) for key in self.BUDGET_KEYS}
+
+    def apply(self):
+        """Applies the budgets to every framework.
+
+        Must run before TensorFlow is imported and before torch does any
+        parallel work; frameworks that are already initialized keep their pools.
+        """
+        cv2.setNumThreads(self.opencv)
+        self.apply_torch()
+        self.apply_tensorflow()
+        logging.info(f"Thread budgets: {self.budgets()}")
+
+    def apply_torch(self):
+        os.environ["OMP_NUM_THREADS"] = str(self.torch)
+        try:
+            import torch
+        except ImportError:
+            return
+        torch.set_num_threads(self.torch)
+        try:
+            torch.set_num_interop_threads(self.torch_interop)
+        except RuntimeError:
+            logging.warning("torch inter-op pool already started, budget not applied")
+
+    def apply_tensorflow(self):
+        # TensorFlow reads these when it initializes, so importing it here
+        # just to configure it is not needed.
+        os.environ["TF_NUM_INTRAOP_THREADS"] = str(self.tf_intra)
+        os.environ["TF_NUM_INTEROP_THREADS"] = str(self.tf_inter)
+        if "tensorflow" not in sys.modules:
+            return
+        tf = sys.modules["tensorflow"]
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(self.tf_intra)
+            tf.config.threading.set_inter_op_parallelism_threads(self.tf_inter)
+        except RuntimeError:
+            logging.warning("TensorFlow already initialized, budget not applied")
+
+    def pin_current_thread(self, role):
+        """Pins the calling thread to the CPUs configured for "capture" or "inference".
+
+        Threads started afterwards from this thread inherit the affinity, so
+        pinning before the inference frameworks start their pools also pins
+        the pools.
+        """
+        cpus = {"capture": self.capture_cpus, "inference": self.inference_cpus}[role]
+        if not cpus:
+            return
+        if not hasattr(os, "sched_setaffinity"):
+            logging.warning("CPU affinity is not supported on this platform")
+            return
+        os.sched_setaffinity(threading.get_native_id(), cpus)
+        logging.info(f"Pinned {role} thread to CPUs {sorted(cpus)}")
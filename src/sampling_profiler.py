@@ -0,0 +1,125 @@
+import datetime
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+
+class SamplingProfiler:
+    """Samples the Python stacks of every thread for a fixed window on demand.
+
+    While running, a background thread reads sys._current_frames() every
+    interval seconds and counts each distinct stack, so the profiled code
+    is not instrumented and runs at full speed between samples. At the end
+    of the window the counts are written as collapsed stacks, one
+    "thread;outer;...;inner count" line per stack, which flamegraph.pl,
+    inferno and speedscope read directly:
+
+        flamegraph.pl profiles/profile_<time>.folded > profile.svg
+
+    Frames are labelled "qualified name (file:first line)", so every
+    function is one frame however many lines of it were sampled.
+    """
+
+    DEFAULT_SECONDS = 30.0
+
+    def __init__(self, seconds=DEFAULT_SECONDS, interval=0.01, output_dir="profiles"):
+        self.seconds = seconds
+        self.interval = interval
+        self.output_dir = Path(output_dir)
+        # Reentrant, as the signal handler may interrupt start() on the main thread
+        self.lock = threading.RLock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_path = None
+
+    def start(self, seconds=None):
+        """Profiles for seconds on a background thread.
+
+        Returns False without starting if a profile is already running.
+        """
+        seconds = seconds or self.seconds
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                logging.info("Profiler is already running")
+                return False
+            self.stop_event.clear()
+            self.thread = threading.Thread(
+                target=self.run, args=(seconds,), name="profiler", daemon=True
+            )
+            self.thread.start()
+        logging.info(f"Profiling all threads for {seconds:g} s")
+        return True
+
+    def stop(self):
+        """Ends a running profile early and writes what was sampled."""
+        thread = self.thread
+        if thread:
+            self.stop_event.set()
+            thread.join()
+
+    def install_signal(self, signum=getattr(signal, "SIGUSR1", None)):
+        """Starts a profile when the process receives signum, e.g. kill -USR1 <pid>.
+
+        Python runs signal handlers on the main thread, so this must be
+        called from it. Does nothing where the signal does not exist.
+        """
+        if signum is not None:
+            signal.signal(signum, lambda *_: self.start())
+
+    def sample(self, counts, names):
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            counts[ident, tuple(codes)] += 1
+        # Kept per sample, so threads that end during the window keep their name
+        names.update((thread.ident, thread.name) for thread in threading.enumerate())
+
+    def run(self, seconds):
+        counts = Counter()
+        names = {}
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline and not self.stop_event.wait(self.interval):
+            self.sample(counts, names)
+            samples += 1
+        self.last_path = self.write(counts, names)
+        threads = len({ident for ident, _ in counts})
+        logging.info(
+            f"Wrote {samples} samples of {threads} threads to {self.last_path}"
+        )
+
+    @staticmethod
+    def label(code):
+        filename = code.co_filename
+        if filename.startswith(os.getcwd() + os.sep):
+            filename = os.path.relpath(filename)
+        name = getattr(code, "co_qualname", code.co_name)
+        return f"{name} ({filename}:{code.co_firstlineno})"
+
+    def write(self, counts, names):
+        labels = {}
+        stacks = Counter()
+        for (ident, codes), count in counts.items():
+            frames = [names.get(ident, f"thread-{ident}")]
+            for code in reversed(codes):
+                if code not in labels:
+                    labels[code] = self.label(code)
+                frames.append(labels[code])
+            stacks[";".join(frames)] += count
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = self.output_dir / f"profile_{stamp}.folded"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
+        return path
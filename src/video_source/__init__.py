@@ -0,0 +1,75 @@
+import os
+
+from .camera_source import CameraSource
+from .image_sequence_source import ImageSequenceSource
+from .synthetic_source import SyntheticSource
+from .video_file_source import VideoFileSource
+from .video_source import VideoSource
+
+
+def open_video_source(
+    spec=0,
+    width=None,
+    height=None,
+    fps=None,
+    fourcc=None,
+    buffer_size=None,
+    loop=False,
+):
+    """Opens a source from a spec.
+
+    A device index opens a camera, "synthetic" or "synthetic:WxH" the
+    generator, a directory or glob pattern an image sequence and anything else
+    a video file. For replayed sources fps paces playback.
+    """
+    if isinstance(spec, int) or str(spec).isdigit():
+        return CameraSource(int(spec), width, height, fps, fourcc, buffer_size)
+    if spec.startswith("synthetic"):
+        _, _, size = spec.partition(":")
+        if size:
+            width, height = (int(v) for v in size.lower().split("x"))
+        return SyntheticSource(width or 640, height or 480, fps=fps)
+    if os.path.isdir(spec) or any(c in spec for c in "*?["):
+        return ImageSequenceSource(spec, fps=fps, loop=loop)
+    return VideoFileSource(spec, fps=fps, loop=loop)
+
+
+def add_video_source_arguments(parser):
+    """Adds the capture property options shared by the entry points."""
+    parser.add_argument("--width", type=int, help="capture width")
+    parser.add_argument("--height", type=int, help="capture height")
+    parser.add_argument(
+        "--fps", type=float, help="camera fps, or replay pace for files and images"
+    )
+    parser.add_argument("--fourcc", help="camera pixel format, e.g. MJPG")
+    parser.add_argument(
+        "--buffer-size",
+        type=int,
+        help="camera driver buffer size, 1 for lowest latency",
+    )
+    parser.add_argument(
+        "--loop", action="store_true", help="loop video files and image sequences"
+    )
+
+
+def video_source_properties(args):
+    return {
+        "width": args.width,
+        "height": args.height,
+        "fps": args.fps,
+        "fourcc": args.fourcc,
+        "buffer_size": args.buffer_size,
+        "loop": args.loop,
+    }
+
+
+__all__ = [
+    "add_video_source_arguments",
+    "video_source_properties",
+    "CameraSource",
+    "ImageSequenceSource",
+    "SyntheticSource",
+    "VideoFileSource",
+    "VideoSource",
+    "open_video_source",
+]
@@ -0,0 +1,65 @@
+import logging
+import time
+
+import cv2
+
+from src.video_source.video_source import VideoSource
+
+
+class CameraSource(VideoSource):
+    """Reads a capture device with explicit capture properties.
+
+    MJPG usually lets USB cameras deliver higher resolutions at full frame
+    rate, and a buffer size of 1 keeps the driver from queueing stale frames.
+    """
+
+    def __init__(
+        self,
+        index=0,
+        width=None,
+        height=None,
+        fps=None,
+        fourcc=None,
+        buffer_size=None,
+    ):
+        # The device paces itself, so fps is a capture property here
+        super().__init__()
+        self.index = index
+        self.properties = []
+        if fourcc:
+            self.properties.append(
+                (cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            )
+        if width:
+            self.properties.append((cv2.CAP_PROP_FRAME_WIDTH, width))
+        if height:
+            self.properties.append((cv2.CAP_PROP_FRAME_HEIGHT, height))
+        if fps:
+            self.properties.append((cv2.CAP_PROP_FPS, fps))
+        if buffer_size:
+            self.properties.append((cv2.CAP_PROP_BUFFERSIZE, buffer_size))
+        self.cap = self.open()
+
+    def open(self):
+        cap = cv2.VideoCapture(self.index)
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open video capture device {self.index}")
+        for prop, value in self.properties:
+            if not cap.set(prop, value):
+                logging.warning(f"Camera {self.index} ignored property {prop}={value}")
+        time.sleep(1)  # One-time delay to allow the camera to initialize
+        return cap
+
+    def read_frame(self):
+        if not self.cap.isOpened():
+            logging.warning("Camera not opened, attempting to reopen...")
+            self.cap.release()
+            self.cap = self.open()
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
@@ -0,0 +1,37 @@
+import glob
+import os
+
+import cv2
+
+from src.video_source.video_source import VideoSource
+
+
+class ImageSequenceSource(VideoSource):
+    """Replays a directory or glob pattern of images in sorted order."""
+
+    IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+    def __init__(self, pattern, fps=None, loop=False):
+        super().__init__(fps=fps, loop=loop)
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "*")
+        self.paths = sorted(
+            path
+            for path in glob.glob(pattern)
+            if path.lower().endswith(self.IMAGE_EXTENSIONS)
+        )
+        if not self.paths:
+            raise RuntimeError(f"No images found for {pattern}")
+        self.position = 0
+
+    def read_frame(self):
+        if self.position >= len(self.paths):
+            self.ended = True
+            return None
+        frame = cv2.imread(self.paths[self.position])
+        self.position += 1
+        return frame
+
+    def rewind(self):
+        self.position = 0
+        return True
@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+
+from src.video_source.video_source import VideoSource
+
+
+class SyntheticSource(VideoSource):
+    """Generates deterministic frames with a moving blob, no device needed."""
+
+    def __init__(self, width=640, height=480, fps=None, frame_count=None, seed=0):
+        super().__init__(fps=fps)
+        self.width = width
+        self.height = height
+        self.frame_count = frame_count
+        rng = np.random.default_rng(seed)
+        self.background = rng.integers(0, 64, (height, width, 3), dtype=np.uint8)
+        self.position = 0
+
+    def read_frame(self):
+        if self.frame_count is not None and self.position >= self.frame_count:
+            self.ended = True
+            return None
+        frame = self.background.copy()
+        x = int((self.position * 4) % self.width)
+        cv2.circle(frame, (x, self.height // 2), self.height // 6, (200, 180, 160), -1)
+        cv2.putText(
+            frame,
+            str(self.position),
+            (10, 30),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1,
+            (255, 255, 255),
+            2,
+        )
+        self.position += 1
+        return frame
+
+    def rewind(self):
+        self.position = 0
+        return True
@@ -0,0 +1,31 @@
+import cv2
+
+from src.video_source.video_source import VideoSource
+
+
+class VideoFileSource(VideoSource):
+    """Replays a video file, optionally paced at a fixed fps and looped."""
+
+    def __init__(self, path, fps=None, loop=False):
+        super().__init__(fps=fps, loop=loop)
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Could not open video file {path}")
+
+    def read_frame(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            # A file has no transient failures, a failed read is its end
+            self.ended = True
+            return None
+        return frame
+
+    def rewind(self):
+        return self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
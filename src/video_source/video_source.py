@@ -0,0 +1,57 @@
+import time
+
+
+class VideoSource:
+    """Base class for frame sources.
+
+    read() returns the next BGR frame or None. Sources given an fps are paced
+    to it, so replays run at a fixed, reproducible rate; without one they run
+    as fast as frames can be produced.
+
+    A finite source whose read_frame runs out sets ended, so callers can tell
+    the end of a replay from a failed grab and stop reading. Looping sources
+    rewind instead and never end.
+    """
+
+    def __init__(self, fps=None, loop=False):
+        self.fps = fps
+        self.loop = loop
+        self.frames_read = 0
+        self.next_frame_at = None
+        self.ended = False
+
+    def read(self):
+        frame = self.read_frame()
+        if frame is None and self.ended and self.loop and self.rewind():
+            self.ended = False
+            frame = self.read_frame()
+        if frame is not None:
+            self.frames_read += 1
+            self.pace()
+        return frame
+
+    def pace(self):
+        if not self.fps:
+            return
+        now = time.perf_counter()
+        if self.next_frame_at is None:
+            self.next_frame_at = now
+        delay = self.next_frame_at - now
+        if delay > 0:
+            time.sleep(delay)
+        # Do not try to catch up after a stall, just continue from now
+        self.next_frame_at = max(self.next_frame_at, now) + 1.0 / self.fps
+
+    def read_frame(self):
+        """Returns the next frame, or None after setting ended at the end."""
+        raise NotImplementedError
+
+    def rewind(self):
+        """Restarts the source for looping; returns False if it cannot."""
+        return False
+
+    def is_opened(self):
+        return True
+
+    def release(self):
+        pass
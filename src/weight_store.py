@@ -0,0 +1,299 @@
+"""Local store of model weights, so startup never downloads anything.
+
+Weights are installed once, with network access or from a copy of another
+store, and their SHA-256 is recorded in manifest.json. At load time a file
+is re-hashed only when its size or modification time changed since it was
+last verified. Missing or corrupted weights raise WeightStoreError instead
+of falling back to a download. Install and check a store from the
+repository root:
+
+    python -m src.weight_store install --root weights
+    python -m src.weight_store install --root weights --source /media/usb/weights
+    python -m src.weight_store verify --root weights
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DEEPFACE_URL = "https://github.com/serengil/deepface_models/releases/download/v1.0/"
+
+# Store name -> (path inside the store, where install fetches it from,
+# expected SHA-256). install rejects a file that does not match its pin and
+# refuses to download a file without one; --sha256 NAME=HASH supplies or
+# overrides a pin.
+WEIGHTS = {
+    "emotion": (
+        ".deepface/weights/facial_expression_model_weights.h5",
+        DEEPFACE_URL + "facial_expression_model_weights.h5",
+        None,
+    ),
+    "age": (
+        ".deepface/weights/age_model_weights.h5",
+        DEEPFACE_URL + "age_model_weights.h5",
+        None,
+    ),
+    "gender": (
+        ".deepface/weights/gender_model_weights.h5",
+        DEEPFACE_URL + "gender_model_weights.h5",
+        None,
+    ),
+    # Bundled with facenet_pytorch 2.6.0, copied so they are checksummed too
+    "pnet": (
+        "mtcnn/pnet.pt",
+        "facenet_pytorch:data/pnet.pt",
+        "a2a71925e0b9996a42f63e47efc1ca19043e69558b5c523b978d611dfae49c8f",
+    ),
+    "rnet": (
+        "mtcnn/rnet.pt",
+        "facenet_pytorch:data/rnet.pt",
+        "bbb937de72efc9ef83b186c49f5f558467a1d7e3453a8ece0d71a886633f6a86",
+    ),
+    "onet": (
+        "mtcnn/onet.pt",
+        "facenet_pytorch:data/onet.pt",
+        "165bfbe42940416ccfb977545cf0e976d5bf321f67083ae2aaaa5c764280118d",
+    ),
+}
+ANALYZER_WEIGHTS = ["emotion", "age", "gender"]
+MTCNN_WEIGHTS = ["pnet", "rnet", "onet"]
+
+
+class WeightStoreError(RuntimeError):
+    pass
+
+
+def sha256_of(path, chunk_size=2**20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def timed_load(model, load_times):
+    """Records the wall time of loading a model in load_times[model] and logs it."""
+    start = time.perf_counter()
+    yield
+    load_times[model] = time.perf_counter() - start
+    logging.info(f"Loaded {model} in {load_times[model] * 1000:.0f} ms")
+
+
+class WeightStore:
+    """Resolves and verifies model weight files.
+
+    The DeepFace files are laid out as DEEPFACE_HOME expects, so pointing
+    DeepFace at the store with use_for_deepface() makes it find its weights
+    instead of downloading them.
+    """
+
+    DEFAULT_ROOT = os.getenv("WEIGHT_STORE", "weights")
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = Path(root)
+        self.manifest_path = self.root / "manifest.json"
+        self.manifest = self.read_manifest()
+        self.lock = threading.Lock()
+
+    def read_manifest(self):
+        if not self.manifest_path.exists():
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def write_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        temporary = self.manifest_path.with_suffix(".tmp")
+        with open(temporary, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        temporary.replace(self.manifest_path)
+
+    def path(self, name):
+        """Returns the verified path of a weight file, never downloading it."""
+        self.verify(name)
+        return self.root / WEIGHTS[name][0]
+
+    @staticmethod
+    def pinned(name, expected=None):
+        """Returns the expected SHA-256 of a weight, from expected or WEIGHTS."""
+        return (expected or {}).get(name) or WEIGHTS[name][2]
+
+    def verify(self, name, full=False):
+        """Checks a file against its recorded checksum.
+
+        Unless full is set, the hash is only recomputed when the size or
+        modification time differs from when it was last verified.
+        """
+        path = self.root / WEIGHTS[name][0]
+        with self.lock:
+            entry = self.manifest.get(name)
+            if entry is None or not path.exists():
+                raise WeightStoreError(
+                    f"Weights '{name}' are not installed in {self.root}, run "
+                    f"python -m src.weight_store install --root {self.root}"
+                )
+            pinned = self.pinned(name)
+            if pinned and entry["sha256"] != pinned:
+                raise WeightStoreError(
+                    f"Weights '{name}' in {self.root} were installed with a "
+                    f"checksum other than the pinned one, reinstall with --force"
+                )
+            stat = path.stat()
+            stamp = [stat.st_size, stat.st_mtime_ns]
+            if not full and entry.get("verified") == stamp:
+                return
+            if stat.st_size != entry["size"] or sha256_of(path) != entry["sha256"]:
+                raise WeightStoreError(
+                    f"Checksum mismatch for {path}, reinstall it with "
+                    f"python -m src.weight_store install --root {self.root} --force {name}"
+                )
+            entry["verified"] = stamp
+            self.write_manifest()
+
+    def install(self, names=None, source=None, force=False, expected=None):
+        """Fetches weights into the store, checks them and records their checksums.
+
+        With source, files are copied from another store directory and must
+        match the checksums in its manifest; otherwise DeepFace weights are
+        downloaded and MTCNN weights copied from the facenet_pytorch package.
+        Every file must match its pinned SHA-256, from expected ({name:
+        sha256}) or WEIGHTS; a file without a pin is only copied from a source
+        store, never downloaded.
+        """
+        source_store = WeightStore(source) if source else None
+        for name in names or list(WEIGHTS):
+            relative, origin, _ = WEIGHTS[name]
+            path = self.root / relative
+            if name in self.manifest and path.exists() and not force:
+                logging.info(f"{name}: already installed")
+                continue
+            pinned = self.pinned(name, expected)
+            if not pinned and not source_store:
+                raise WeightStoreError(
+                    f"{name} has no pinned SHA-256, pass --sha256 {name}=HASH "
+                    f"to install it from {origin}"
+                )
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = path.with_name(path.name + ".part")
+            if source_store:
+                shutil.copyfile(source_store.path(name), temporary)
+            elif origin.startswith("facenet_pytorch:"):
+                shutil.copyfile(self.package_file(origin), temporary)
+            else:
+                import gdown
+
+                gdown.download(origin, str(temporary), quiet=False)
+            checksum = sha256_of(temporary)
+            try:
+                if source_store and checksum != source_store.manifest[name]["sha256"]:
+                    raise WeightStoreError(
+                        f"Checksum mismatch copying {name} from {source}"
+                    )
+                if pinned and checksum != pinned:
+                    raise WeightStoreError(
+                        f"{name}: got SHA-256 {checksum} from {origin}, "
+                        f"expected {pinned}"
+                    )
+            except WeightStoreError:
+                temporary.unlink()
+                raise
+            temporary.replace(path)
+            stat = path.stat()
+            self.manifest[name] = {
+                "sha256": checksum,
+                "size": stat.st_size,
+                "verified": [stat.st_size, stat.st_mtime_ns],
+            }
+            self.write_manifest()
+            logging.info(f"{name}: installed {path} ({stat.st_size / 2**20:.1f} MB)")
+
+    @staticmethod
+    def package_file(origin):
+        package, _, relative = origin.partition(":")
+        spec = importlib.util.find_spec(package)
+        if spec is None:
+            raise WeightStoreError(f"{package} is not installed")
+        return Path(next(iter(spec.submodule_search_locations))) / relative
+
+    def use_for_deepface(self):
+        """Verifies the DeepFace weights and points DeepFace at the store."""
+        for name in ANALYZER_WEIGHTS:
+            self.path(name)
+        os.environ["DEEPFACE_HOME"] = str(self.root.resolve())
+
+    def load_torch(self, name):
+        """Loads a torch state dict, memory-mapped when the file format allows."""
+        import torch
+
+        path = self.path(name)
+        try:
+            return torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+        except RuntimeError:
+            # Files saved in the legacy (non-zip) format cannot be mapped
+            return torch.load(path, map_location="cpu", weights_only=True)
+
+    def name_of(self, file_name):
+        """Returns the store name of a weight file name."""
+        for name, (relative, _, _) in WEIGHTS.items():
+            if Path(relative).name == file_name:
+                return name
+        raise WeightStoreError(f"{file_name} is not a known weight file")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["install", "verify", "list"])
+    parser.add_argument(
+        "names", nargs="*", help=f"weights, default all: {list(WEIGHTS)}"
+    )
+    parser.add_argument("--root", default=WeightStore.DEFAULT_ROOT)
+    parser.add_argument(
+        "--source", help="copy from another store instead of downloading"
+    )
+    parser.add_argument("--force", action="store_true", help="reinstall existing files")
+    parser.add_argument(
+        "--sha256",
+        action="append",
+        default=[],
+        metavar="NAME=HASH",
+        help="expected checksum of a weight, overriding WEIGHTS; repeatable",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    store = WeightStore(args.root)
+    if args.command == "install":
+        expected = dict(pin.split("=", 1) for pin in args.sha256)
+        store.install(args.names, args.source, args.force, expected)
+    elif args.command == "verify":
+        failed = False
+        for name in args.names or list(store.manifest):
+            try:
+                store.verify(name, full=True)
+                print(f"{name}: ok")
+            except (WeightStoreError, OSError) as e:
+                print(f"{name}: {e}")
+                failed = True
+        raise SystemExit(1 if failed else 0)
+    else:
+        for name, (relative, _, _) in WEIGHTS.items():
+            entry = store.manifest.get(name)
+            status = (
+                f"{entry['sha256'][:16]}  {entry['size'] / 2**20:8.1f} MB"
+                if entry
+                else "missing"
+            )
+            print(f"{name:<8} {status}  {relative}")
+
+
+if __name__ == "__main__":
+    main()